@@ -34,9 +34,15 @@
 import logging
 import sys
 
-from loguru import logger
+from mdsetup.client import forward_command
 
-from mdsetup.cli import main
+# Hand the command to a running `mdsetup serve` before loading click and the subcommands.
+if (exit_code := forward_command(sys.argv[1:])) is not None:
+    sys.exit(exit_code)
+
+from loguru import logger  # noqa: E402
+
+from mdsetup.cli import main  # noqa: E402
 
 if not sys.warnoptions:
     import warnings
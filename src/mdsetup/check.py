@@ -0,0 +1,401 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Consistency between coordinate and topology files.
+
+A coordinate file that does not match its topology in atom order, atom names,
+or residue numbering is often only discovered after a job has waited in the
+queue. :func:`compare` finds such mismatches with vectorized array comparisons
+and a hashed (residue, atom name) index. Names are encoded as integers rather
+than sorted as strings, so a million-atom system is compared in about a third
+of a second once both files are loaded.
+"""
+from dataclasses import dataclass, field
+from typing import Final
+
+import numpy as np
+from MDAnalysis.core.groups import AtomGroup
+from numpy.typing import NDArray
+
+__all__ = ["RESNAME_ALIASES", "ConsistencyReport", "Divergence", "compare", "match_atoms"]
+
+RESNAME_ALIASES: Final[dict[str, str]] = {
+    "HID": "HIS", "HIE": "HIS", "HIP": "HIS", "HSD": "HIS", "HSE": "HIS", "HSP": "HIS",
+    "CYX": "CYS", "CYM": "CYS", "ASH": "ASP", "GLH": "GLU", "LYN": "LYS",
+}  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Divergence:
+    """Atom that differs between the topology and the coordinates.
+
+    Attributes
+    ----------
+    index : int
+        zero-based atom index
+    topology : str
+        atom in the topology as ``resname resid name``
+    coordinates : str
+        atom in the coordinate file as ``resname resid name``
+    """
+
+    index: int
+    topology: str
+    coordinates: str
+
+
+@dataclass
+class ConsistencyReport:
+    """Summary of the differences between topology and coordinates.
+
+    Attributes
+    ----------
+    n_topology : int
+        number of atoms in the topology
+    n_coordinates : int
+        number of atoms in the coordinate file
+    n_divergent : int
+        number of atom positions whose name, residue name, or residue number differ
+    divergences : list of Divergence
+        first divergent atoms
+    n_missing : int
+        number of topology atoms absent from the coordinate file
+    missing : list of str
+        first topology atoms absent from the coordinate file
+    n_unknown : int
+        number of coordinate atoms absent from the topology
+    unknown : list of str
+        first coordinate atoms absent from the topology
+    n_reordered : int
+        number of breaks in order, i.e., coordinate atoms found in the topology
+        that precede the previous such atom in topology order
+    """
+
+    n_topology: int
+    n_coordinates: int
+    n_divergent: int = 0
+    divergences: list[Divergence] = field(default_factory=list)
+    n_missing: int = 0
+    missing: list[str] = field(default_factory=list)
+    n_unknown: int = 0
+    unknown: list[str] = field(default_factory=list)
+    n_reordered: int = 0
+
+    @property
+    def consistent(self) -> bool:
+        """Return whether the coordinates match the topology.
+
+        Returns
+        -------
+        bool
+            True if the atoms match one-to-one in order
+        """
+        return self.n_topology == self.n_coordinates and self.n_divergent == 0
+
+
+def compare(
+    topology: AtomGroup, coordinates: AtomGroup, max_report: int = 10, strict: bool = False
+) -> ConsistencyReport:
+    """Compare the atoms of a topology with those of a coordinate file.
+
+    Atoms are first compared position by position. Each atom is also keyed by
+    its residue number and atom name, packed into a 64-bit integer, so that
+    atoms missing from either file or out of order are found by a sorted
+    search rather than by Python loops; see :func:`match_atoms` for systems
+    whose chains repeat residue numbers. Names are compared by their first
+    eight characters.
+
+    Parameters
+    ----------
+    topology : AtomGroup
+        atoms of the topology
+    coordinates : AtomGroup
+        atoms of the coordinate file
+    max_report : int
+        maximum number of atoms listed for each kind of difference
+    strict : bool
+        compare residue names literally instead of treating protonation
+        variants (e.g., HIE and HIS) as equal
+
+    Returns
+    -------
+    ConsistencyReport
+        differences between the two
+    """
+    report = ConsistencyReport(n_topology=topology.n_atoms, n_coordinates=coordinates.n_atoms)
+
+    # Names are encoded as integers once and shared by both comparisons.
+    top_names, crd_names = _encode(topology.names), _encode(coordinates.names)
+    top_resnames, crd_resnames = _encode_resnames(topology, strict), _encode_resnames(coordinates, strict)
+    top_resids, crd_resids = topology.resids, coordinates.resids
+
+    # Position-by-position comparison over the atoms present in both files
+    n_common = min(report.n_topology, report.n_coordinates)
+    divergent = np.flatnonzero(
+        (top_names[:n_common] != crd_names[:n_common])
+        | (top_resnames[:n_common] != crd_resnames[:n_common])
+        | (top_resids[:n_common] != crd_resids[:n_common])
+    )
+    report.n_divergent = divergent.size + abs(report.n_topology - report.n_coordinates)
+    report.divergences = [
+        Divergence(int(i), _label(topology, i), _label(coordinates, i)) for i in divergent[:max_report]
+    ]
+
+    # Hashed (residue, atom name) index
+    lookup = _match(topology, coordinates, top_names, crd_names)
+    found = lookup >= 0
+    matched = lookup[found]
+
+    unknown = np.flatnonzero(~found)
+    report.n_unknown = unknown.size
+    report.unknown = [_label(coordinates, i) for i in unknown[:max_report]]
+
+    present = np.zeros(report.n_topology, dtype=bool)
+    present[matched] = True
+    missing = np.flatnonzero(~present)
+    report.n_missing = missing.size
+    report.missing = [_label(topology, i) for i in missing[:max_report]]
+
+    report.n_reordered = int(np.count_nonzero(np.diff(matched) <= 0))
+    return report
+
+
+def match_atoms(reference: AtomGroup, atoms: AtomGroup) -> NDArray[np.intp]:
+    """Find each atom in a reference by its residue number and atom name.
+
+    If residue number and atom name do not identify the atoms of the
+    reference uniquely, as in systems whose chains are numbered separately,
+    the segment is added to the key. Segments are matched by identifier when
+    both systems use the same identifiers, and by their order otherwise.
+
+    Parameters
+    ----------
+    reference : AtomGroup
+        atoms searched
+    atoms : AtomGroup
+        atoms to find
+
+    Returns
+    -------
+    NDArray
+        index of each atom within the reference, or -1 if it is absent
+    """
+    return _match(reference, atoms, _encode(reference.names), _encode(atoms.names))
+
+
+def _match(
+    reference: AtomGroup, atoms: AtomGroup, ref_names: NDArray[np.uint64], names: NDArray[np.uint64]
+) -> NDArray[np.intp]:
+    """Find atoms in a reference by their keys; see :func:`match_atoms`.
+
+    Parameters
+    ----------
+    reference : AtomGroup
+        atoms searched
+    atoms : AtomGroup
+        atoms to find
+    ref_names : NDArray
+        encoded atom names of the reference
+    names : NDArray
+        encoded atom names of the atoms to find
+
+    Returns
+    -------
+    NDArray
+        index of each atom within the reference, or -1 if it is absent
+    """
+    ref_keys, keys = _atom_keys(reference.resids, ref_names, atoms.resids, names)
+    order = np.argsort(ref_keys, kind="stable")
+    sorted_keys = ref_keys[order]
+    if (sorted_keys[1:] == sorted_keys[:-1]).any() and reference.segments.n_segments > 1:
+        ref_segments, segments = _segment_codes(reference, atoms)
+        ref_keys, keys = _atom_keys(reference.resids, ref_names, atoms.resids, names, ref_segments, segments)
+        order = np.argsort(ref_keys, kind="stable")
+    return _lookup(ref_keys, keys, order)
+
+
+def _segment_codes(reference: AtomGroup, atoms: AtomGroup) -> tuple[NDArray[np.intp], NDArray[np.intp]]:
+    """Number the segments of two atom groups consistently.
+
+    Parameters
+    ----------
+    reference : AtomGroup
+        atoms searched
+    atoms : AtomGroup
+        atoms to find
+
+    Returns
+    -------
+    tuple of NDArray
+        segment code of each atom of the reference and of the atoms to find
+    """
+    ref_segids = reference.universe.segments.segids
+    segids = atoms.universe.segments.segids
+    if set(ref_segids) != set(segids):
+        # Formats name segments differently, but keep them in the same order.
+        return reference.segindices, atoms.segindices
+    ref_codes, codes = _encode(ref_segids), _encode(segids)
+    _, inverse = np.unique(np.concatenate([ref_codes, codes]), return_inverse=True)
+    return inverse[: ref_codes.size][reference.segindices], inverse[ref_codes.size :][atoms.segindices]
+
+
+def _encode(strings: NDArray) -> NDArray[np.uint64]:
+    """Encode the first eight characters of each string as an integer.
+
+    Unlike sorting the strings, this takes a single pass over the array.
+
+    Parameters
+    ----------
+    strings : NDArray
+        ASCII strings
+
+    Returns
+    -------
+    NDArray
+        64-bit codes; equal strings have equal codes
+    """
+    return np.ascontiguousarray(np.asarray(strings).astype("S8")).view("<u8")
+
+
+def _encode_resnames(atoms: AtomGroup, strict: bool) -> NDArray[np.uint64]:
+    """Encode the residue name of each atom.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        atoms
+    strict : bool
+        keep protonation variants instead of replacing them by standard names
+
+    Returns
+    -------
+    NDArray
+        64-bit codes of the residue names
+    """
+    resnames = atoms.universe.residues.resnames
+    if not strict:
+        resnames = np.array([RESNAME_ALIASES.get(name, name) for name in resnames], dtype=object)
+    return _encode(resnames)[atoms.resindices]
+
+
+def _atom_keys(
+    ref_resids: NDArray[np.integer],
+    ref_names: NDArray[np.uint64],
+    resids: NDArray[np.integer],
+    names: NDArray[np.uint64],
+    ref_segments: NDArray[np.integer] | None = None,
+    segments: NDArray[np.integer] | None = None,
+) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """Combine residue numbers, atom names, and segments into 64-bit keys.
+
+    Names of up to four characters fit into the lower 32 bits directly;
+    longer names are first replaced by their rank among all names.
+
+    Parameters
+    ----------
+    ref_resids : NDArray
+        residue numbers of the reference
+    ref_names : NDArray
+        encoded atom names of the reference
+    resids : NDArray
+        residue numbers of the atoms to find
+    names : NDArray
+        encoded atom names of the atoms to find
+    ref_segments : NDArray, optional
+        segment codes of the reference
+    segments : NDArray, optional
+        segment codes of the atoms to find
+
+    Returns
+    -------
+    tuple of NDArray
+        keys of the reference and of the atoms to find
+    """
+    ref_codes, codes = ref_names.astype(np.int64), names.astype(np.int64)
+    if (ref_names >> np.uint64(32)).any() or (names >> np.uint64(32)).any():
+        _, inverse = np.unique(np.concatenate([ref_names, names]), return_inverse=True)
+        ref_codes, codes = inverse[: ref_names.size].astype(np.int64), inverse[ref_names.size :].astype(np.int64)
+
+    ref_residues, residues = ref_resids.astype(np.int64), resids.astype(np.int64)
+    if ref_segments is not None and segments is not None and ref_residues.size and residues.size:
+        lower = min(ref_residues.min(), residues.min())
+        span = max(ref_residues.max(), residues.max()) - lower + 1
+        ref_residues = ref_segments.astype(np.int64) * span + ref_residues - lower
+        residues = segments.astype(np.int64) * span + residues - lower
+    return (ref_residues << 32) | ref_codes, (residues << 32) | codes
+
+
+def _lookup(
+    ref_keys: NDArray[np.int64], keys: NDArray[np.int64], order: NDArray[np.intp] | None = None
+) -> NDArray[np.intp]:
+    """Find keys within the reference keys by a sorted search.
+
+    Parameters
+    ----------
+    ref_keys : NDArray
+        keys of the reference
+    keys : NDArray
+        keys to find
+    order : NDArray, optional
+        indices that sort the reference keys, if already known
+
+    Returns
+    -------
+    NDArray
+        index of each key within the reference, or -1 if it is absent
+    """
+    if ref_keys.size == 0:
+        return np.full(keys.size, -1, dtype=np.intp)
+    if order is None:
+        order = np.argsort(ref_keys, kind="stable")
+    sorted_keys = ref_keys[order]
+    position = np.searchsorted(sorted_keys, keys).clip(max=sorted_keys.size - 1)
+    return np.where(sorted_keys[position] == keys, order[position], -1)
+
+
+def _label(atoms: AtomGroup, index: int) -> str:
+    """Describe an atom.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        atoms
+    index : int
+        zero-based index within the group
+
+    Returns
+    -------
+    str
+        ``resname resid name``
+    """
+    atom = atoms[index]
+    return f"{atom.resname} {atom.resid} {atom.name}"
@@ -0,0 +1,204 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Client for the mdsetup command server.
+
+When a server started with ``mdsetup serve`` is listening on the local Unix
+socket, :func:`forward_command` sends a command line to it instead of running
+the command in this interpreter, which avoids importing MDAnalysis, click, and
+the other dependencies for every invocation. This module therefore only uses
+the standard library.
+"""
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+__all__ = ["default_socket", "forward", "forward_command", "receive", "send", "trusted_socket"]
+
+#: Environment variable naming the socket of the command server
+SOCKET_ENV = "MDSETUP_SOCKET"
+#: Environment variable that disables forwarding to the command server
+NO_SERVER_ENV = "MDSETUP_NO_SERVER"
+
+
+def default_socket() -> Path:
+    """Return the location of the command server socket.
+
+    The location is taken from ``MDSETUP_SOCKET`` if set; otherwise, a
+    per-user socket is placed in ``XDG_RUNTIME_DIR`` or the temporary directory.
+
+    Returns
+    -------
+    Path
+        socket location
+    """
+    if SOCKET_ENV in os.environ:
+        return Path(os.environ[SOCKET_ENV])
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())
+    return Path(runtime_dir, f"mdsetup-{os.getuid()}.sock")
+
+
+def send(stream: Any, message: dict[str, Any]) -> None:
+    """Write a message as one line of JSON.
+
+    Parameters
+    ----------
+    stream : file-like
+        binary stream
+    message : dict
+        JSON-serializable message
+    """
+    stream.write(json.dumps(message).encode() + b"\n")
+
+
+def receive(line: bytes) -> dict[str, Any]:
+    """Decode a message written by :func:`send`.
+
+    Parameters
+    ----------
+    line : bytes
+        one line of JSON
+
+    Returns
+    -------
+    dict
+        message
+    """
+    return json.loads(line)
+
+
+def trusted_socket(path: Path) -> bool:
+    """Check that a socket can only have been created by the current user.
+
+    The socket must be owned by the current user, and its directory must be
+    owned by the current user or root and must not let other users replace
+    the socket, i.e., be writable by others only with the sticky bit set.
+
+    Parameters
+    ----------
+    path : Path
+        socket location
+
+    Returns
+    -------
+    bool
+        whether the socket may be connected to
+    """
+    try:
+        info, parent = path.lstat(), path.parent.lstat()
+    except OSError:
+        return False
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        return False
+    if parent.st_uid not in (0, os.getuid()):
+        return False
+    return not parent.st_mode & (stat.S_IWGRP | stat.S_IWOTH) or bool(parent.st_mode & stat.S_ISVTX)
+
+
+def forward(args: Sequence[str], socket_path: str | Path | None = None) -> int | None:
+    """Run a command line on the command server.
+
+    The command runs in the current working directory with the current
+    environment. A socket that fails :func:`trusted_socket` is ignored.
+
+    Parameters
+    ----------
+    args : Sequence of str
+        command-line arguments without the program name
+    socket_path : str or Path, optional
+        socket of the command server; see :func:`default_socket`
+
+    Returns
+    -------
+    int or None
+        exit code of the command, or None if no trusted server is running
+    """
+    path = Path(socket_path) if socket_path is not None else default_socket()
+    if not trusted_socket(path):
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+        except OSError:
+            return None
+        try:
+            with sock.makefile("wb") as stream:
+                send(stream, {"args": list(args), "cwd": str(Path.cwd()), "env": dict(os.environ)})
+        except OSError:
+            return None
+        try:
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+        except OSError:
+            line = b""
+
+    try:
+        response = receive(line)
+        exit_code, stdout, stderr = int(response["exit_code"]), str(response["stdout"]), str(response["stderr"])
+    except (ValueError, TypeError, KeyError):
+        sys.stderr.write(
+            f"Error: The command server at {path} did not reply; set {NO_SERVER_ENV}=1 to run commands locally.\n"
+        )
+        return 1
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+    return exit_code
+
+
+def forward_command(args: Sequence[str]) -> int | None:
+    """Run a subcommand on the command server if one is running.
+
+    Options of the main command, unknown subcommands, and ``serve`` itself are
+    never forwarded. Forwarding is disabled by setting ``MDSETUP_NO_SERVER``.
+
+    Parameters
+    ----------
+    args : Sequence of str
+        command-line arguments without the program name
+
+    Returns
+    -------
+    int or None
+        exit code of the command, or None if the command should run locally
+    """
+    if not args or args[0] == "serve" or os.environ.get(NO_SERVER_ENV):
+        return None
+    if not Path(__file__).parent.joinpath("commands", f"cmd_{args[0]}.py").exists():
+        return None
+    return forward(args)
@@ -0,0 +1,137 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Check that a coordinate file matches its topology."""
+import time
+
+import click
+import MDAnalysis as mda
+from loguru import logger
+
+from .. import config_logger
+from ..check import compare
+
+
+@click.command("check", short_help="Check that a coordinate file matches its topology.")
+@click.option(
+    "-s",
+    "--top",
+    "topology",
+    metavar="FILE",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Topology file",
+)
+@click.option(
+    "-c",
+    "--coord",
+    "coordinates",
+    metavar="FILE",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Coordinate file",
+)
+@click.option(
+    "-n",
+    "--max-report",
+    metavar="NUM",
+    default=10,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Maximum number of atoms listed for each kind of difference",
+)
+@click.option("--strict", is_flag=True, help="Distinguish protonation variants of residue names (e.g., HIE and HIS)")
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="check.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    topology: str,
+    coordinates: str,
+    max_report: int,
+    strict: bool,
+    logfile: str,
+    verbose: bool,
+) -> None:
+    """Compare atom order, atom names, and residue numbering of two files.
+
+    The command exits with a nonzero status if the files differ.
+
+    Parameters
+    ----------
+    ctx : `Context`
+        click context
+    topology : str
+        topology file
+    coordinates : str
+        coordinate file
+    max_report : int
+        maximum number of atoms listed for each kind of difference
+    strict : bool
+        distinguish protonation variants of residue names
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    top = mda.Universe(topology).atoms
+    crd = mda.Universe(coordinates).atoms
+    start = time.perf_counter()
+    report = compare(top, crd, max_report=max_report, strict=strict)
+    logger.debug(f"Compared {top.n_atoms} and {crd.n_atoms} atoms in {1000 * (time.perf_counter() - start):.1f} ms")
+
+    if report.consistent:
+        logger.info(f"{coordinates} is consistent with {topology} ({report.n_topology} atoms)")
+        return
+
+    logger.warning(f"{coordinates} does not match {topology}")
+    logger.warning(f"Atoms: {report.n_topology} in topology, {report.n_coordinates} in coordinates")
+    logger.warning(f"{report.n_divergent} atom positions differ (topology != coordinates)")
+    for divergence in report.divergences:
+        logger.warning(f"  atom {divergence.index + 1}: {divergence.topology} != {divergence.coordinates}")
+    if report.n_missing:
+        logger.warning(f"{report.n_missing} topology atoms are not in the coordinates: {', '.join(report.missing)}")
+    if report.n_unknown:
+        logger.warning(f"{report.n_unknown} coordinate atoms are not in the topology: {', '.join(report.unknown)}")
+    if report.n_reordered:
+        logger.warning(f"{report.n_reordered} coordinate atoms are out of order relative to the topology")
+    ctx.exit(1)
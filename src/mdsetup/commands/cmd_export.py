@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Export directories from a project store."""
+from pathlib import Path
+
+import click
+
+from .. import config_logger
+from ..store import ProjectStore
+
+
+@click.command("export", short_help="Export directories from a project store.")
+@click.option(
+    "-i",
+    "--input",
+    "store",
+    metavar="FILE",
+    default="project.db",
+    show_default=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Project store",
+)
+@click.option(
+    "-o",
+    "--outdir",
+    metavar="DIR",
+    default=".",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help="Output directory",
+)
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="export.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+@click.argument("prefixes", metavar="[DIR]...", nargs=-1)
+def cli(store: Path, outdir: Path, logfile: str, verbose: bool, prefixes: tuple[str, ...]) -> None:
+    """Materialize only the requested directories of a project store.
+
+    When no directories are given, the entire project is exported.
+
+    Parameters
+    ----------
+    store : Path
+        project store
+    outdir : Path
+        output directory
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+    prefixes : tuple of str
+        directories within the project store to export
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    with ProjectStore(store, readonly=True) as project:
+        project.export(outdir, prefixes=prefixes or ("",))
@@ -0,0 +1,157 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Precompute atom selections used by the equilibration protocol."""
+from pathlib import Path
+
+import click
+import MDAnalysis as mda
+from loguru import logger
+
+from .. import config_logger
+from ..selections import SelectionIndex, check_name
+
+_SUFFIXES = {"amber": "mask", "charmm": "str", "gromacs": "ndx"}
+
+
+@click.command("index", short_help="Precompute atom selections for all equilibration stages.")
+@click.option(
+    "-s",
+    "--top",
+    "topology",
+    metavar="FILE",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Topology file",
+)
+@click.option(
+    "-o",
+    "--outdir",
+    metavar="DIR",
+    default=".",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help="Output directory",
+)
+@click.option("-p", "--prefix", metavar="PREFIX", default="index", show_default=True, help="Prefix for output files")
+@click.option(
+    "-e",
+    "--engine",
+    "engines",
+    multiple=True,
+    default=tuple(_SUFFIXES),
+    show_default=True,
+    type=click.Choice(list(_SUFFIXES), case_sensitive=False),
+    help="Simulation package(s) for which selections are written",
+)
+@click.option(
+    "--select",
+    "selections",
+    metavar="NAME=SELECTION",
+    multiple=True,
+    help="Additional selection in the MDAnalysis selection language",
+)
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="index.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+def cli(
+    topology: str,
+    outdir: Path,
+    prefix: str,
+    engines: tuple[str, ...],
+    selections: tuple[str, ...],
+    logfile: str,
+    verbose: bool,
+) -> None:
+    """Compute the solute, heavy atom, backbone, water, and ion selections once.
+
+    The selections are saved as index arrays in `PREFIX.npz` and written for
+    each simulation package as Amber masks (`PREFIX.mask`), CHARMM selections
+    (`PREFIX.str`), or Gromacs index groups (`PREFIX.ndx`).
+
+    Parameters
+    ----------
+    topology : str
+        topology file
+    outdir : Path
+        output directory
+    prefix : str
+        prefix for output files
+    engines : tuple of str
+        simulation packages
+    selections : tuple of str
+        additional selections as NAME=SELECTION
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+
+    Raises
+    ------
+    BadParameter
+        if an additional selection is not of the form NAME=SELECTION or its name
+        is invalid or already defined
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    extra = {}
+    for selection in selections:
+        name, sep, text = selection.partition("=")
+        name = name.strip()
+        if not sep or not name:
+            raise click.BadParameter(f"{selection} is not of the form NAME=SELECTION", param_hint="--select")
+        if name in SelectionIndex.STANDARD or name in extra:
+            raise click.BadParameter(f"'{name}' is already defined", param_hint="--select")
+        try:
+            check_name(name)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--select") from e
+        extra[name] = text.strip()
+
+    universe = mda.Universe(topology)
+    index = SelectionIndex.from_universe(universe, extra)
+    for name, indices in index.items():
+        logger.debug(f"{name}: {indices.size} atoms")
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    index.save(outdir / f"{prefix}.npz")
+    for engine in engines:
+        filename = outdir / f"{prefix}.{_SUFFIXES[engine.lower()]}"
+        index.write(filename, engine)
+        logger.info(f"Wrote {engine} selections to {filename}")
@@ -0,0 +1,121 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Store coordinates as a single-precision memory-mapped array."""
+from pathlib import Path
+
+import click
+import MDAnalysis as mda
+from loguru import logger
+
+from .. import config_logger
+from ..lowmem import DEFAULT_CHUNK_SIZE, CoordinateMap, peak_memory
+
+
+@click.command("memmap", short_help="Store coordinates as a float32 memory-mapped array.")
+@click.option(
+    "-s",
+    "--top",
+    "topology",
+    metavar="FILE",
+    default=None,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Topology file; not needed for a PDB file",
+)
+@click.option(
+    "-c",
+    "--coord",
+    "coordinates",
+    metavar="FILE",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Coordinate file",
+)
+@click.option(
+    "-o",
+    "--output",
+    metavar="FILE",
+    default="coordinates.npy",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Memory-mapped coordinates",
+)
+@click.option(
+    "--chunk-size",
+    metavar="NUM",
+    default=DEFAULT_CHUNK_SIZE,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of atoms processed at a time",
+)
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="memmap.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+def cli(topology: str | None, coordinates: str, output: Path, chunk_size: int, logfile: str, verbose: bool) -> None:
+    """Copy coordinates into a float32 `.npy` file for low-memory processing.
+
+    A PDB file without a topology is streamed in chunks and never loaded as a
+    whole; other formats are read whole through MDAnalysis. The peak memory of
+    the process is reported at the end.
+
+    Parameters
+    ----------
+    topology : str, optional
+        topology file
+    coordinates : str
+        coordinate file
+    output : Path
+        memory-mapped coordinates
+    chunk_size : int
+        number of atoms processed at a time
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    if topology is None and Path(coordinates).suffix.lower() in {".pdb", ".ent"}:
+        coords = CoordinateMap.from_pdb(coordinates, output, chunk_size=chunk_size)
+    else:
+        universe = mda.Universe(coordinates) if topology is None else mda.Universe(topology, coordinates)
+        coords = CoordinateMap.from_universe(universe.atoms, output, chunk_size=chunk_size)
+
+    logger.info(f"Wrote {coords.n_atoms} atoms to {output} ({coords.positions.nbytes / 2**20:.1f} MiB)")
+    logger.info(f"Peak memory: {peak_memory() / 2**20:.1f} MiB")
@@ -0,0 +1,93 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Pack a project directory into a single-file project store."""
+from pathlib import Path
+
+import click
+from loguru import logger
+
+from .. import config_logger
+from ..store import ProjectStore
+
+
+@click.command("pack", short_help="Pack a project directory into a single project store.")
+@click.option(
+    "-d",
+    "--directory",
+    metavar="DIR",
+    default=".",
+    show_default=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help="Project directory",
+)
+@click.option(
+    "-o",
+    "--output",
+    metavar="FILE",
+    default="project.db",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Project store",
+)
+@click.option("-p", "--prefix", metavar="PREFIX", default="", help="Directory name within the project store")
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="pack.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+def cli(directory: Path, output: Path, prefix: str, logfile: str, verbose: bool) -> None:
+    """Pack all files within a directory into a single project store.
+
+    Parameters
+    ----------
+    directory : Path
+        project directory
+    output : Path
+        project store
+    prefix : str
+        directory name within the project store
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    with ProjectStore(output) as store:
+        store.add_tree(directory, prefix=prefix, exclude=[logfile])
+        logger.info(f"{output} holds {len(store)} files")
@@ -0,0 +1,194 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Re-solvate edited solutes locally using a solvated parent system."""
+from pathlib import Path
+
+import click
+import MDAnalysis as mda
+from loguru import logger
+
+from .. import config_logger
+from ..lowmem import peak_memory
+from ..resolvate import PreparedParent, resolvate
+
+
+@click.command("resolvate", short_help="Re-solvate mutants or ligand swaps locally from a solvated parent.")
+@click.option(
+    "-s",
+    "--top",
+    "topology",
+    metavar="FILE",
+    default=None,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Topology of the solvated parent; not needed for a PDB file",
+)
+@click.option(
+    "-c",
+    "--coord",
+    "coordinates",
+    metavar="FILE",
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Coordinates of the solvated parent",
+)
+@click.option(
+    "-m",
+    "--mutant",
+    "mutants",
+    metavar="FILE",
+    multiple=True,
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Edited solute (may be repeated)",
+)
+@click.option(
+    "-o",
+    "--outdir",
+    metavar="DIR",
+    default=".",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help="Output directory",
+)
+@click.option(
+    "-r",
+    "--radius",
+    metavar="RADIUS",
+    default=8.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0, min_open=True),
+    help="Radius (Å) around changed atoms that is re-solvated",
+)
+@click.option(
+    "--clash",
+    metavar="DIST",
+    default=2.5,
+    show_default=True,
+    type=click.FloatRange(min=0.0, min_open=True),
+    help="Minimum distance (Å) between water and other atoms",
+)
+@click.option("--cation", metavar="NAME", default="Na+", show_default=True, help="Name of added cations")
+@click.option("--anion", metavar="NAME", default="Cl-", show_default=True, help="Name of added anions")
+@click.option(
+    "--ion-distance",
+    metavar="DIST",
+    default=5.0,
+    show_default=True,
+    type=click.FloatRange(min=0.0),
+    help="Minimum distance (Å) between added ions and the solute",
+)
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="resolvate.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+def cli(
+    topology: str | None,
+    coordinates: str,
+    mutants: tuple[Path, ...],
+    outdir: Path,
+    radius: float,
+    clash: float,
+    cation: str,
+    anion: str,
+    ion_distance: float,
+    logfile: str,
+    verbose: bool,
+) -> None:
+    """Solvate each edited solute by reusing the solvent of the parent system.
+
+    Only waters within RADIUS of added, removed, or moved solute atoms are
+    replaced, and ions are rebalanced for the change in formal charge; all
+    other solvent coordinates are copied unchanged. The parent is read and
+    indexed once for all mutants, and each result is written to
+    `OUTDIR/<mutant>_solv.pdb`.
+
+    Parameters
+    ----------
+    topology : str, optional
+        topology of the solvated parent
+    coordinates : str
+        coordinates of the solvated parent
+    mutants : tuple of Path
+        edited solutes
+    outdir : Path
+        output directory
+    radius : float
+        radius around changed atoms that is re-solvated
+    clash : float
+        minimum distance between water and other atoms
+    cation : str
+        name of added cations
+    anion : str
+        name of added anions
+    ion_distance : float
+        minimum distance between added ions and the solute
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    universe = mda.Universe(coordinates) if topology is None else mda.Universe(topology, coordinates)
+    try:
+        parent = PreparedParent(universe, cutoff=radius + clash + ion_distance)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    outdir.mkdir(parents=True, exist_ok=True)
+    for mutant in mutants:
+        try:
+            universe, report = resolvate(
+                parent,
+                mda.Universe(mutant),
+                radius=radius,
+                clash=clash,
+                cation=cation,
+                anion=anion,
+                ion_distance=ion_distance,
+            )
+        except ValueError as e:
+            raise click.ClickException(f"{mutant.name}: {e}") from e
+        output = outdir / f"{mutant.stem}_solv.pdb"
+        universe.atoms.write(output)
+        logger.info(
+            f"{output.name}: {report.n_changed} solute atoms changed, "
+            f"{report.n_waters_removed} waters removed, {report.n_waters_added} added, "
+            f"{report.n_ions_removed} ions removed, {report.n_ions_added} added"
+        )
+    logger.info(f"Peak memory: {peak_memory() / 2**20:.1f} MiB")
@@ -0,0 +1,101 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Run a command server with a warm pool of workers."""
+from pathlib import Path
+
+import click
+
+from .. import config_logger
+from ..client import default_socket
+from ..server import CommandServer
+
+
+@click.command("serve", short_help="Run a server that executes mdsetup commands with warm workers.")
+@click.option(
+    "-S",
+    "--socket",
+    "socket_path",
+    metavar="FILE",
+    default=default_socket,
+    show_default="$MDSETUP_SOCKET or mdsetup-<uid>.sock in $XDG_RUNTIME_DIR",
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Unix socket on which to listen",
+)
+@click.option(
+    "-w",
+    "--workers",
+    metavar="NUM",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Number of worker processes [default: number of CPUs]",
+)
+@click.option(
+    "-l",
+    "--logfile",
+    metavar="LOG",
+    default="serve.log",
+    show_default=True,
+    type=click.Path(exists=False, file_okay=True, dir_okay=False, resolve_path=True),
+    help="Log file",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Show debug messages")
+def cli(socket_path: Path, workers: int | None, logfile: str, verbose: bool) -> None:
+    """Keep worker processes with MDAnalysis and all subcommands loaded.
+
+    While the server runs, other `mdsetup` commands are sent to it over the
+    socket and run by a warm worker. The server listens on the socket named
+    by `MDSETUP_SOCKET` or a per-user default; set `MDSETUP_NO_SERVER` to run
+    a command locally. Stop the server with SIGINT or SIGTERM.
+
+    Parameters
+    ----------
+    socket_path : Path
+        Unix socket on which to listen
+    workers : int, optional
+        number of worker processes
+    logfile : str
+        log file
+    verbose : bool
+        show debug messages
+
+    Raises
+    ------
+    ClickException
+        if another server is listening on the socket
+    """
+    config_logger(logfile=logfile, level="DEBUG" if verbose else "INFO")
+
+    try:
+        CommandServer(socket_path, workers=workers).serve_forever()
+    except RuntimeError as e:
+        raise click.ClickException(str(e)) from e
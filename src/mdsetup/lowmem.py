@@ -0,0 +1,193 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Low-memory coordinate handling for very large systems.
+
+Multi-million-atom systems, such as membranes or viral capsids, do not fit
+comfortably in the memory of a login node when coordinates are copied between
+stages. :class:`CoordinateMap` keeps coordinates as single-precision values in
+a memory-mapped NumPy file that can be read one slice at a time, and
+:func:`peak_memory` reports the high-water mark of the process.
+
+This is a conversion step only. The other stages, including
+:func:`mdsetup.resolvate.resolvate`, still load systems through MDAnalysis,
+whose per-atom topology arrays outweigh the coordinates, so solvation, ion
+placement, and export are not processed in chunks.
+"""
+import resource
+import sys
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Final
+
+import numpy as np
+from MDAnalysis.core.groups import AtomGroup
+
+__all__ = ["CoordinateMap", "peak_memory"]
+
+DEFAULT_CHUNK_SIZE: Final[int] = 1_000_000
+_PDB_RECORDS: Final[tuple[str, ...]] = ("ATOM  ", "HETATM")
+# Both ENDMDL and END end the first model.
+_PDB_END: Final[str] = "END"
+
+
+def peak_memory() -> int:
+    """Return the peak resident memory of the process.
+
+    Returns
+    -------
+    int
+        peak memory in bytes
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes; macOS reports bytes.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+class CoordinateMap:
+    """Single-precision coordinates stored in a memory-mapped ``.npy`` file.
+
+    Parameters
+    ----------
+    filename : str or Path
+        existing ``.npy`` file of shape (n_atoms, 3)
+    mode : str
+        memory-map mode: 'r' (read-only), 'r+' (read-write), or 'c' (copy-on-write)
+    """
+
+    def __init__(self, filename: str | Path, mode: str = "r") -> None:
+        self.filename = Path(filename)
+        self.positions: np.memmap = np.load(self.filename, mmap_mode=mode)
+        if self.positions.ndim != 2 or self.positions.shape[1] != 3:
+            raise ValueError(f"{self.filename} does not contain coordinates of shape (n_atoms, 3).")
+
+    @property
+    def n_atoms(self) -> int:
+        """Return the number of atoms.
+
+        Returns
+        -------
+        int
+            number of atoms
+        """
+        return self.positions.shape[0]
+
+    @classmethod
+    def from_universe(
+        cls, atoms: AtomGroup, filename: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> "CoordinateMap":
+        """Copy the coordinates of an atom group to a memory-mapped file.
+
+        The atoms are already in memory, so this saves no memory during the
+        conversion; it serves formats that cannot be streamed like PDB.
+
+        Parameters
+        ----------
+        atoms : AtomGroup
+            atoms with coordinates
+        filename : str or Path
+            output ``.npy`` file
+        chunk_size : int
+            number of atoms copied at a time
+
+        Returns
+        -------
+        CoordinateMap
+            memory-mapped coordinates
+        """
+        positions = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float32, shape=(atoms.n_atoms, 3))
+        for start in range(0, atoms.n_atoms, chunk_size):
+            positions[start : start + chunk_size] = atoms[start : start + chunk_size].positions
+        positions.flush()
+        del positions
+        return cls(filename)
+
+    @classmethod
+    def from_pdb(cls, pdb: str | Path, filename: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> "CoordinateMap":
+        """Stream the coordinates of a PDB file into a memory-mapped file.
+
+        Only one chunk of ATOM and HETATM records is held in memory at a time,
+        so the PDB file is never loaded as a whole. Only the first model of a
+        file with several models is read.
+
+        Parameters
+        ----------
+        pdb : str or Path
+            PDB file
+        filename : str or Path
+            output ``.npy`` file
+        chunk_size : int
+            number of atoms parsed at a time
+
+        Returns
+        -------
+        CoordinateMap
+            memory-mapped coordinates
+        """
+        with open(pdb) as stream:
+            n_atoms = sum(1 for _ in _atom_records(stream))
+
+        positions = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float32, shape=(n_atoms, 3))
+        start = 0
+        batch: list[tuple[str, str, str]] = []
+        with open(pdb) as stream:
+            for line in _atom_records(stream):
+                batch.append((line[30:38], line[38:46], line[46:54]))
+                if len(batch) == chunk_size:
+                    positions[start : start + len(batch)] = np.array(batch, dtype=np.float32)
+                    start += len(batch)
+                    batch.clear()
+        if batch:
+            positions[start : start + len(batch)] = np.array(batch, dtype=np.float32)
+        positions.flush()
+        del positions
+        return cls(filename)
+
+
+def _atom_records(stream: Iterable[str]) -> Iterator[str]:
+    """Yield the ATOM and HETATM records of the first model of a PDB file.
+
+    Parameters
+    ----------
+    stream : Iterable of str
+        lines of a PDB file
+
+    Yields
+    ------
+    str
+        atom records up to the first ENDMDL or END record
+    """
+    for line in stream:
+        if line.startswith(_PDB_RECORDS):
+            yield line
+        elif line.startswith(_PDB_END):
+            return
@@ -0,0 +1,718 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Incremental re-solvation of edited solutes.
+
+Variants in a mutant scan or a series of ligands differ from an already
+solvated parent system by only a few atoms. :func:`resolvate` reuses the
+parent's solvent: waters are removed and refilled only within a local region
+around the changed atoms, counterions are rebalanced for the change in formal
+charge, and all other solvent atoms keep their coordinates exactly. A
+:class:`PreparedParent` indexes the parent's solvent once, so that each
+variant only searches the neighborhood of its edit.
+"""
+from dataclasses import dataclass
+from typing import Final
+
+import MDAnalysis as mda
+import numpy as np
+from loguru import logger
+from MDAnalysis.core.groups import AtomGroup
+from MDAnalysis.lib.distances import capped_distance, minimize_vectors
+from MDAnalysis.lib.mdamath import triclinic_vectors
+from MDAnalysis.lib.pkdtree import PeriodicKDTree
+from numpy.typing import NDArray
+
+from .check import match_atoms
+from .selections import IONS, WATERS
+
+__all__ = ["FORMAL_CHARGES", "PreparedParent", "ResolvationReport", "formal_charge", "resolvate"]
+
+FORMAL_CHARGES: Final[dict[str, int]] = {
+    "ALA": 0, "ASN": 0, "CYS": 0, "CYX": 0, "GLN": 0, "GLY": 0, "HIS": 0, "HID": 0, "HIE": 0, "HSD": 0, "HSE": 0,
+    "ILE": 0, "LEU": 0, "MET": 0, "PHE": 0, "PRO": 0, "SER": 0, "THR": 0, "TRP": 0, "TYR": 0, "VAL": 0,
+    "ASH": 0, "GLH": 0, "LYN": 0, "ACE": 0, "NME": 0, "NHE": 0,
+    "ARG": 1, "LYS": 1, "HIP": 1, "HSP": 1, "ASP": -1, "GLU": -1, "CYM": -1,
+    "Na+": 1, "NA": 1, "SOD": 1, "K+": 1, "K": 1, "POT": 1, "Li+": 1, "LI": 1, "LIT": 1,
+    "Rb+": 1, "RB": 1, "Cs+": 1, "CS": 1, "CES": 1,
+    "Cl-": -1, "CL": -1, "CLA": -1, "F-": -1, "F": -1, "Br-": -1, "BR": -1, "I-": -1, "I": -1,
+    "Mg2+": 2, "MG": 2, "Ca2+": 2, "CAL": 2, "Zn2+": 2, "ZN": 2, "ZN2": 2,
+}  # fmt: skip
+
+#: Per-atom topology attributes copied to the re-solvated system when present
+_ATOM_ATTRIBUTES: Final[tuple[str, ...]] = (
+    "segids", "chainIDs", "elements", "types", "masses", "charges", "occupancies", "tempfactors",
+)  # fmt: skip
+#: Largest distance in Angstroms between a water oxygen and the other atoms of its molecule
+_WATER_RADIUS: Final[float] = 1.0
+
+
+@dataclass
+class ResolvationReport:
+    """Summary of an incremental re-solvation.
+
+    Attributes
+    ----------
+    n_changed : int
+        number of solute atoms added, removed, renamed, or moved
+    n_waters_removed : int
+        number of parent waters removed, including those replaced by ions
+    n_waters_added : int
+        number of waters added to fill space vacated by the solute
+    n_ions_removed : int
+        number of parent ions removed
+    n_ions_added : int
+        number of ions added
+    charge_change : int
+        change in the formal charge of the solute
+    """
+
+    n_changed: int = 0
+    n_waters_removed: int = 0
+    n_waters_added: int = 0
+    n_ions_removed: int = 0
+    n_ions_added: int = 0
+    charge_change: int = 0
+
+
+def formal_charge(atoms: AtomGroup) -> int:
+    """Sum the formal charges of the residues of an atom group.
+
+    The partial charges of the topology are summed when it has them, which
+    also covers ligands. Otherwise, residues are looked up in
+    :data:`FORMAL_CHARGES`, and a warning is logged for residues found in
+    neither, which are counted as neutral.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        atoms
+
+    Returns
+    -------
+    int
+        formal charge
+    """
+    if hasattr(atoms, "charges"):
+        return int(np.rint(atoms.charges.sum()))
+    return _table_charge(atoms)
+
+
+def _table_charge(atoms: AtomGroup) -> int:
+    """Sum the formal charges of the residues of an atom group from :data:`FORMAL_CHARGES`.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        atoms
+
+    Returns
+    -------
+    int
+        formal charge; residues not in the table are counted as neutral with a warning
+    """
+    resnames = atoms.residues.resnames
+    unknown = sorted(set(resnames) - FORMAL_CHARGES.keys() - WATERS)
+    if unknown:
+        logger.warning(f"No charges for {', '.join(unknown)}; these residues are assumed to be neutral.")
+    return sum(FORMAL_CHARGES.get(resname, 0) for resname in resnames)
+
+
+class PreparedParent:
+    """Solvated parent system indexed once for re-solvating many variants.
+
+    The solute, water, and ion atoms are identified, and the water oxygens
+    are placed in a periodic k-d tree, so that :func:`resolvate` only searches
+    the neighborhood of each edit.
+
+    Parameters
+    ----------
+    parent : Universe
+        solvated parent system with coordinates and unit cell
+    cutoff : float
+        largest distance in Angstroms searched with the k-d tree; longer
+        searches scan every water
+
+    Raises
+    ------
+    ValueError
+        if the parent system has no water
+    """
+
+    def __init__(self, parent: mda.Universe, cutoff: float = 16.0) -> None:
+        self.universe = parent
+        self.cutoff = cutoff
+        self.box = parent.dimensions
+        # A view of the current frame rather than a copy
+        self.positions = parent.trajectory.ts.positions
+        water, ions = _solvent(parent)
+        #: solute atoms
+        self.solute = parent.atoms[~(water | ions)]
+        #: indices of the ions
+        self.ions = np.flatnonzero(ions)
+        #: formal charge of each ion
+        self.ion_charges = np.array([FORMAL_CHARGES.get(name, 0) for name in parent.atoms[self.ions].resnames])
+        self.waters = _Waters(parent.atoms, np.flatnonzero(water))
+        if self.waters.n_waters == 0:
+            raise ValueError("The parent system contains no water.")
+        self._tree = PeriodicKDTree(box=self.box)
+        self._tree.set_coords(self.positions[self.waters.oxygens], cutoff=cutoff)
+
+    def near_waters(self, centers: NDArray[np.floating], cutoff: float) -> NDArray[np.intp]:
+        """Find the water molecules whose oxygen is within a cutoff of any center.
+
+        Parameters
+        ----------
+        centers : NDArray
+            positions
+        cutoff : float
+            distance cutoff in Angstroms
+
+        Returns
+        -------
+        NDArray
+            sorted indices of the water molecules
+        """
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        if centers.size == 0:
+            return np.empty(0, dtype=np.intp)
+        if cutoff <= self.cutoff:
+            return self._tree.search(centers, cutoff).astype(np.intp)
+        return np.flatnonzero(_near(centers, self.positions[self.waters.oxygens], cutoff, self.box))
+
+
+def resolvate(
+    parent: PreparedParent | mda.Universe,
+    solute: mda.Universe,
+    radius: float = 8.0,
+    clash: float = 2.5,
+    tolerance: float = 1.0e-3,
+    cation: str = "Na+",
+    anion: str = "Cl-",
+    ion_distance: float = 5.0,
+) -> tuple[mda.Universe, ResolvationReport]:
+    """Solvate an edited solute using the solvent of a solvated parent system.
+
+    Solute atoms that were added, removed, renamed, or moved are found with
+    the hashed (residue, atom name) index of :func:`mdsetup.check.match_atoms`,
+    which also keys on the segment if residue numbers repeat across chains.
+    Parent waters within `radius` of these atoms are located with the k-d tree
+    of the prepared parent; those that now clash with the solute are removed,
+    and space vacated by the solute is filled with an equilibrated patch of the
+    parent's bulk water. Counterions nearest to the edit are then removed, or
+    waters near the edit are replaced by ions, to compensate the change in
+    formal charge of the changed residues; see :func:`formal_charge`. The solvent is written after the solute as ions and then
+    waters, each in the parent's order, and atoms keep their segments, chains,
+    and other topology attributes.
+
+    Parameters
+    ----------
+    parent : PreparedParent or Universe
+        solvated parent system; prepare it once when re-solvating several variants
+    solute : Universe
+        edited solute; any water or ions within it are ignored
+    radius : float
+        radius in Angstroms of the region around changed atoms that is re-solvated
+    clash : float
+        minimum distance in Angstroms between a water atom and any other atom
+    tolerance : float
+        distance in Angstroms an atom must move to count as changed
+    cation : str
+        name of added cations
+    anion : str
+        name of added anions
+    ion_distance : float
+        minimum distance in Angstroms between an added ion and the solute
+
+    Returns
+    -------
+    tuple
+        re-solvated system and a summary of the changes
+
+    Raises
+    ------
+    ValueError
+        if the parent system has no water, or if solute atoms cannot be
+        identified by segment, residue number, and atom name
+    """
+    if isinstance(parent, mda.Universe):
+        parent = PreparedParent(parent)
+    box, positions, waters = parent.box, parent.positions, parent.waters
+    old = parent.solute
+    water, ions = _solvent(solute)
+    new = solute.atoms[~(water | ions)]
+
+    # Solute atoms that differ from the parent
+    lookup = match_atoms(old, new)
+    found = lookup >= 0
+    if (np.bincount(lookup[found], minlength=old.n_atoms) > 1).any():
+        raise ValueError("Solute atoms are not uniquely identified by segment, residue number, and atom name.")
+    changed = ~found
+    changed[found] = (old.resnames[lookup[found]] != new.resnames[found]) | (
+        np.linalg.norm(old.positions[lookup[found]] - new.positions[found], axis=1) > tolerance
+    )
+    retained = np.zeros(old.n_atoms, dtype=bool)
+    retained[lookup[found]] = True
+    centers = np.concatenate([new.positions[changed], old.positions[~retained]])
+    report = ResolvationReport(n_changed=int(np.count_nonzero(changed) + np.count_nonzero(~retained)))
+
+    removed = np.zeros(waters.n_waters, dtype=bool)
+    patch_atoms = np.empty(0, dtype=np.intp)
+    patch_positions = np.empty((0, 3), dtype=np.float32)
+    if centers.size:
+        # Remove waters in the region that clash with the edited solute.
+        region_atoms = waters.members(parent.near_waters(centers, radius))
+        clashing = _near(new.positions, positions[region_atoms], clash, box)
+        removed[waters.residue_of(region_atoms[clashing])] = True
+
+        # Fill vacated space with parent bulk water translated onto the region.
+        site = centers.mean(axis=0)
+        patch_atoms, patch_positions = _patch(parent, new.positions, centers, site, radius)
+        nearby = parent.near_waters(centers, radius + clash + 2 * _WATER_RADIUS)
+        occupied = np.concatenate(
+            [new.positions, positions[waters.members(nearby[~removed[nearby]])], positions[parent.ions]]
+        )
+        patch_residue = waters.residue_of(patch_atoms)
+        outside = ~_near(centers, patch_positions, radius, box)
+        colliding = _near(occupied, patch_positions, clash, box)
+        oxygen = patch_atoms == waters.oxygens[patch_residue]
+        rejected = np.unique(patch_residue[colliding | (outside & oxygen)])
+        accepted = ~np.isin(patch_residue, rejected)
+        patch_atoms, patch_positions = patch_atoms[accepted], patch_positions[accepted]
+        report.n_waters_added = np.unique(patch_residue[accepted]).size
+
+    # Rebalance counterions for the change in formal charge of the changed residues.
+    report.charge_change = _charge_change(old[np.r_[lookup[found & changed], np.flatnonzero(~retained)]], new[changed])
+    site = centers.mean(axis=0) if centers.size else new.positions.mean(axis=0)
+    removed_ions = np.zeros(parent.ions.size, dtype=bool)
+    added_ions: list[tuple[str, NDArray[np.float32]]] = []
+    needed = -report.charge_change
+    sign = int(np.sign(needed))
+    if needed:
+        # Counterions of the opposite charge nearest to the edit are removed first.
+        opposite = np.flatnonzero(parent.ion_charges == -sign)
+        nearest = opposite[np.argsort(_distances(site, positions[parent.ions[opposite]], box))][: abs(needed)]
+        removed_ions[nearest] = True
+        needed -= sign * nearest.size
+
+        # Waters nearest to the edit, but not too close to the solute, become ions. The nearest
+        # candidates lie within the cutoff of the k-d tree unless there are too few of them.
+        pool = _ion_sites(parent, new.positions, parent.near_waters(site, parent.cutoff), removed, ion_distance)
+        if pool.size < abs(needed):
+            pool = _ion_sites(parent, new.positions, np.arange(waters.n_waters), removed, ion_distance)
+        for water in pool[np.argsort(_distances(site, positions[waters.oxygens[pool]], box))][: abs(needed)]:
+            removed[water] = True
+            added_ions.append((cation if sign > 0 else anion, positions[waters.oxygens[water]]))
+    report.n_ions_removed = int(np.count_nonzero(removed_ions))
+    report.n_ions_added = len(added_ions)
+    report.n_waters_removed = int(np.count_nonzero(removed))
+
+    atoms = parent.universe.atoms
+    universe = _assemble(
+        new,
+        atoms[parent.ions[~removed_ions]],
+        added_ions,
+        atoms[waters.atoms[~removed[waters.residue]]],
+        atoms[patch_atoms],
+        patch_positions,
+        box,
+        atoms[np.r_[parent.ions, waters.atoms[:1]]],
+    )
+    return universe, report
+
+
+class _Waters:
+    """Water molecules of a system.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        all atoms of the system
+    indices : NDArray
+        sorted indices of the water atoms
+    """
+
+    def __init__(self, atoms: AtomGroup, indices: NDArray[np.integer]) -> None:
+        self.atoms = np.asarray(indices, dtype=np.intp)
+        resindices = atoms.resindices[self.atoms]
+        first = np.diff(resindices, prepend=-1) != 0
+        #: water molecule of each water atom
+        self.residue = np.cumsum(first) - 1
+        #: first atom of each water, the oxygen in common water models
+        self.oxygens = self.atoms[first]
+        #: position of the first atom of each water within `atoms`, followed by the number of atoms
+        self.starts = np.r_[np.flatnonzero(first), self.atoms.size]
+
+    @property
+    def n_waters(self) -> int:
+        """Return the number of water molecules.
+
+        Returns
+        -------
+        int
+            number of water molecules
+        """
+        return self.oxygens.size
+
+    def members(self, residues: NDArray[np.integer]) -> NDArray[np.intp]:
+        """Return the atoms of water molecules.
+
+        Parameters
+        ----------
+        residues : NDArray
+            indices of water molecules
+
+        Returns
+        -------
+        NDArray
+            atom indices in the order of the molecules
+        """
+        starts, stops = self.starts[residues], self.starts[np.asarray(residues) + 1]
+        counts = stops - starts
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return self.atoms[np.repeat(starts, counts) + offsets]
+
+    def residue_of(self, atoms: NDArray[np.integer]) -> NDArray[np.intp]:
+        """Return the water molecule of each water atom.
+
+        Parameters
+        ----------
+        atoms : NDArray
+            atom indices of water atoms
+
+        Returns
+        -------
+        NDArray
+            indices of water molecules
+        """
+        return self.residue[np.searchsorted(self.atoms, atoms)]
+
+
+def _charge_change(old: AtomGroup, new: AtomGroup) -> int:
+    """Compute the change in formal charge between residues of the parent and the variant.
+
+    Partial charges are only used if both systems have them; otherwise, both
+    sides are looked up in :data:`FORMAL_CHARGES`, so that charges from a
+    topology are never compared with charges from the table.
+
+    Parameters
+    ----------
+    old : AtomGroup
+        changed atoms of the parent solute
+    new : AtomGroup
+        changed atoms of the variant
+
+    Returns
+    -------
+    int
+        formal charge of the residues of `new` less that of the residues of `old`
+    """
+    old, new = old.residues.atoms, new.residues.atoms
+    if hasattr(old, "charges") and hasattr(new, "charges"):
+        return int(np.rint(new.charges.sum() - old.charges.sum()))
+    return _table_charge(new) - _table_charge(old)
+
+
+def _solvent(universe: mda.Universe) -> tuple[NDArray[np.bool_], NDArray[np.bool_]]:
+    """Identify water and ions by residue name, as :class:`mdsetup.selections.SelectionIndex` does.
+
+    Parameters
+    ----------
+    universe : Universe
+        system
+
+    Returns
+    -------
+    tuple of NDArray
+        True for each water atom and for each ion
+    """
+    resnames = universe.residues.resnames
+    resindices = universe.atoms.resindices
+    return np.isin(resnames, list(WATERS))[resindices], np.isin(resnames, list(IONS))[resindices]
+
+
+def _ion_sites(
+    parent: PreparedParent,
+    solute: NDArray[np.float32],
+    candidates: NDArray[np.intp],
+    removed: NDArray[np.bool_],
+    ion_distance: float,
+) -> NDArray[np.intp]:
+    """Select waters that may be replaced by an ion.
+
+    Parameters
+    ----------
+    parent : PreparedParent
+        solvated parent system
+    solute : NDArray
+        positions of the solute
+    candidates : NDArray
+        indices of water molecules to consider
+    removed : NDArray
+        True for each water molecule already removed
+    ion_distance : float
+        minimum distance in Angstroms between an ion and the solute
+
+    Returns
+    -------
+    NDArray
+        indices of the water molecules that are retained and far enough from the solute
+    """
+    candidates = candidates[~removed[candidates]]
+    too_close = _near(solute, parent.positions[parent.waters.oxygens[candidates]], ion_distance, parent.box)
+    return candidates[~too_close]
+
+
+def _near(
+    reference: NDArray[np.floating], configuration: NDArray[np.floating], cutoff: float, box: NDArray | None
+) -> NDArray[np.bool_]:
+    """Find positions within a cutoff of any reference position.
+
+    Parameters
+    ----------
+    reference : NDArray
+        reference positions
+    configuration : NDArray
+        positions to test
+    cutoff : float
+        distance cutoff in Angstroms
+    box : NDArray, optional
+        unit cell for periodic boundary conditions
+
+    Returns
+    -------
+    NDArray
+        True for each configuration position within the cutoff
+    """
+    mask = np.zeros(len(configuration), dtype=bool)
+    if len(reference) and len(configuration):
+        pairs = capped_distance(reference, configuration, cutoff, box=box, return_distances=False)
+        mask[pairs[:, 1]] = True
+    return mask
+
+
+def _distances(point: NDArray[np.floating], positions: NDArray[np.floating], box: NDArray | None) -> NDArray:
+    """Compute minimum-image distances from a point.
+
+    Parameters
+    ----------
+    point : NDArray
+        position
+    positions : NDArray
+        positions
+    box : NDArray, optional
+        unit cell for periodic boundary conditions
+
+    Returns
+    -------
+    NDArray
+        distances
+    """
+    vectors = (positions - point).astype(np.float32)
+    if box is not None:
+        vectors = minimize_vectors(vectors, box)
+    return np.linalg.norm(vectors, axis=1)
+
+
+def _patch(
+    parent: PreparedParent,
+    solute: NDArray[np.float32],
+    centers: NDArray[np.float32],
+    site: NDArray[np.float32],
+    radius: float,
+) -> tuple[NDArray[np.intp], NDArray[np.float32]]:
+    """Copy bulk water onto the region around changed atoms.
+
+    The bulk water is taken from around the point half a unit cell away from
+    the solute center, the point farthest from the solute under periodic
+    boundary conditions, and translated so that this point falls on the site.
+
+    Parameters
+    ----------
+    parent : PreparedParent
+        solvated parent system
+    solute : NDArray
+        positions of the solute
+    centers : NDArray
+        positions of the changed atoms
+    site : NDArray
+        center of the region to fill
+    radius : float
+        radius in Angstroms of the region around each changed atom
+
+    Returns
+    -------
+    tuple
+        indices of the copied water atoms and their translated positions
+    """
+    box = parent.box
+    if box is None:
+        return np.empty(0, dtype=np.intp), np.empty((0, 3), dtype=np.float32)
+    bulk = (solute.mean(axis=0) + 0.5 * triclinic_vectors(box).sum(axis=0)).astype(np.float32)
+    atoms = parent.waters.members(parent.near_waters(bulk + (centers - site), radius))
+    offsets = minimize_vectors((parent.positions[atoms] - bulk).astype(np.float32), box)
+    return atoms, (site + offsets).astype(np.float32)
+
+
+def _assemble(
+    solute: AtomGroup,
+    ions: AtomGroup,
+    added_ions: list[tuple[str, NDArray[np.float32]]],
+    waters: AtomGroup,
+    patch: AtomGroup,
+    patch_positions: NDArray[np.float32],
+    box: NDArray | None,
+    templates: AtomGroup,
+) -> mda.Universe:
+    """Build a system from the solute, ions, and waters.
+
+    Solute residues keep their numbers; solvent residues are numbered
+    consecutively after the solute. Segments, chains, and the other
+    attributes in :data:`_ATOM_ATTRIBUTES` are copied when both the solute and
+    the parent have them.
+
+    Parameters
+    ----------
+    solute : AtomGroup
+        solute atoms
+    ions : AtomGroup
+        retained ions
+    added_ions : list of tuple
+        name and position of each added ion
+    waters : AtomGroup
+        retained waters
+    patch : AtomGroup
+        parent waters copied to fill vacated space
+    patch_positions : NDArray
+        positions of the copied waters
+    box : NDArray, optional
+        unit cell
+    templates : AtomGroup
+        parent ions followed by a water atom, from which added ions take their attributes
+
+    Returns
+    -------
+    Universe
+        assembled system
+    """
+    ion_names = np.array([name for name, _ in added_ions], dtype=object)
+    ion_positions = np.array([position for _, position in added_ions], dtype=np.float32).reshape(-1, 3)
+    names = np.concatenate([solute.names, ions.names, ion_names, waters.names, patch.names])
+    atom_resnames = np.concatenate([solute.resnames, ions.resnames, ion_names, waters.resnames, patch.resnames])
+    positions = np.concatenate(
+        [solute.positions, ions.positions, ion_positions, waters.positions, patch_positions]
+    ).astype(np.float32)
+    attributes = {
+        attribute: np.concatenate(
+            [
+                getattr(solute, attribute),
+                getattr(ions, attribute),
+                _added_attribute(attribute, ion_names, templates),
+                getattr(waters, attribute),
+                getattr(patch, attribute),
+            ]
+        )
+        for attribute in _ATOM_ATTRIBUTES
+        if hasattr(solute, attribute) and hasattr(templates, attribute)
+    }
+
+    # Residue of each atom; every solvent block starts a new residue.
+    _, solute_residue = np.unique(solute.resindices, return_inverse=True)
+    blocks = (ions.resindices, np.arange(len(added_ions)), waters.resindices, patch.resindices)
+    starts = [np.r_[True, block[1:] != block[:-1]] for block in blocks if block.size]
+    starts = np.concatenate(starts) if starts else np.empty(0, dtype=bool)
+    solvent_residue = np.cumsum(starts) - 1
+    n_solute = int(solute_residue.max()) + 1 if solute.n_atoms else 0
+    atom_resindex = np.concatenate([solute_residue, solvent_residue + n_solute])
+    n_residues = int(atom_resindex.max()) + 1 if atom_resindex.size else 0
+
+    first = np.flatnonzero(np.diff(atom_resindex, prepend=-1) != 0)
+    last_resid = int(solute.resids.max()) if solute.n_atoms else 0
+    resids = np.concatenate([solute.residues.resids, last_resid + 1 + np.arange(n_residues - n_solute)])
+
+    # Segments in order of their first residue
+    atom_segids = attributes.pop("segids", np.full(names.size, "SYS", dtype=object))
+    segids, first_residue, residue_segindex = np.unique(atom_segids[first], return_index=True, return_inverse=True)
+    order = np.argsort(first_residue)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.size)
+
+    universe = mda.Universe.empty(
+        names.size,
+        n_residues=n_residues,
+        n_segments=max(segids.size, 1),
+        atom_resindex=atom_resindex,
+        residue_segindex=rank[residue_segindex],
+        trajectory=True,
+    )
+    universe.add_TopologyAttr("names", names)
+    universe.add_TopologyAttr("resnames", atom_resnames[first])
+    universe.add_TopologyAttr("resids", resids)
+    universe.add_TopologyAttr("segids", segids[order] if segids.size else ["SYS"])
+    for attribute, values in attributes.items():
+        universe.add_TopologyAttr(attribute, values)
+    universe.atoms.positions = positions
+    universe.dimensions = box
+    return universe
+
+
+def _added_attribute(attribute: str, names: NDArray, templates: AtomGroup) -> NDArray:
+    """Return an attribute of added ions.
+
+    Values are copied from a parent ion of the same name. Otherwise, ions
+    take the segment and chain of the parent's water, their formal charge,
+    and blank or zero values for other attributes.
+
+    Parameters
+    ----------
+    attribute : str
+        name of a per-atom attribute
+    names : NDArray
+        names of the added ions
+    templates : AtomGroup
+        parent ions followed by a water atom
+
+    Returns
+    -------
+    NDArray
+        attribute values of the added ions
+    """
+    values = getattr(templates, attribute)
+    known = dict(zip(templates.names[:-1], values[:-1]))
+    if attribute in ("segids", "chainIDs"):
+        default = values[-1]
+    elif values.dtype.kind in "OUS":
+        default = ""
+    else:
+        default = 0
+    added = [known.get(name, FORMAL_CHARGES.get(name, 0) if attribute == "charges" else default) for name in names]
+    return np.array(added, dtype=values.dtype)
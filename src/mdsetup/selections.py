@@ -0,0 +1,428 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Precomputed atom selections.
+
+The equilibration protocol minimizes water and solute separately and restrains
+the solute with decreasing force constants, so the same selections are needed
+at every stage. :class:`SelectionIndex` evaluates them once per system, keeps
+them as compact index arrays, and writes them in the native form of each
+simulation package.
+"""
+import re
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Final
+
+import MDAnalysis as mda
+import numpy as np
+from numpy.typing import NDArray
+
+__all__ = ["IONS", "WATERS", "SelectionIndex", "check_name"]
+
+WATERS: Final[frozenset[str]] = frozenset(
+    {"WAT", "HOH", "H2O", "SOL", "TIP3", "TIP3P", "TIP4", "TIP4P", "TIP5", "TIP5P", "TP3", "T3P", "T4P", "SPC", "OPC"}
+)
+IONS: Final[frozenset[str]] = frozenset(
+    {
+        "Na+", "NA", "SOD", "K+", "K", "POT", "Cl-", "CL", "CLA", "Li+", "LI", "LIT", "Rb+", "RB", "Cs+", "CS", "CES",
+        "Mg2+", "MG", "Ca2+", "CA", "CAL", "Zn2+", "ZN", "ZN2", "F-", "F", "Br-", "BR", "I-", "I",
+    }
+)  # fmt: skip
+
+_INDEX_DTYPE: Final = np.uint32
+_GROMACS_WIDTH: Final[int] = 15
+_CHARMM_WIDTH: Final[int] = 72
+#: Largest number of distinct atom names written as a name filter
+_MAX_FILTER_NAMES: Final[int] = 8
+_NAME_PATTERN: Final = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+# Keyword arguments of `numpy.savez_compressed`
+_RESERVED: Final[frozenset[str]] = frozenset({"file", "allow_pickle"})
+
+
+def check_name(name: str) -> None:
+    """Check that a selection name can be saved and written for every package.
+
+    Parameters
+    ----------
+    name : str
+        selection name
+
+    Raises
+    ------
+    ValueError
+        if the name is reserved or not an identifier starting with a letter
+    """
+    if not _NAME_PATTERN.fullmatch(name) or name in _RESERVED:
+        raise ValueError(f"'{name}' is not a valid selection name; use letters, digits, and underscores.")
+
+
+class SelectionIndex(Mapping[str, NDArray[np.uint32]]):
+    """Named atom selections stored as sorted, zero-based index arrays.
+
+    Parameters
+    ----------
+    groups : Mapping
+        selection name and atom indices
+    residue_starts : NDArray
+        index of the first atom of each residue followed by the number of atoms
+    names : NDArray, optional
+        atom names, used to write selections as residue ranges with an atom
+        name filter instead of atom lists
+
+    Raises
+    ------
+    ValueError
+        if a selection name is invalid; see :func:`check_name`
+    """
+
+    #: Names of the selections computed by :meth:`from_universe`
+    STANDARD: Final[tuple[str, ...]] = ("solute", "heavy", "backbone", "water", "ions")
+
+    def __init__(
+        self,
+        groups: Mapping[str, NDArray[np.integer]],
+        residue_starts: NDArray[np.integer],
+        names: NDArray[np.str_] | None = None,
+    ) -> None:
+        for name in groups:
+            check_name(name)
+        self._groups = {name: np.unique(indices).astype(_INDEX_DTYPE) for name, indices in groups.items()}
+        self.residue_starts = np.asarray(residue_starts, dtype=_INDEX_DTYPE)
+        self.names = None if names is None else np.asarray(names, dtype=str)
+
+    def __getitem__(self, name: str) -> NDArray[np.uint32]:
+        """Return the atom indices of a selection.
+
+        Parameters
+        ----------
+        name : str
+            selection name
+
+        Returns
+        -------
+        NDArray
+            zero-based atom indices
+        """
+        return self._groups[name]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the selection names.
+
+        Returns
+        -------
+        Iterator
+            selection names
+        """
+        return iter(self._groups)
+
+    def __len__(self) -> int:
+        """Return the number of selections.
+
+        Returns
+        -------
+        int
+            number of selections
+        """
+        return len(self._groups)
+
+    @property
+    def n_atoms(self) -> int:
+        """Return the number of atoms in the system.
+
+        Returns
+        -------
+        int
+            number of atoms
+        """
+        return int(self.residue_starts[-1])
+
+    @classmethod
+    def from_universe(cls, universe: mda.Universe, selections: Mapping[str, str] | None = None) -> "SelectionIndex":
+        """Compute the standard selections of a system.
+
+        Water and ions are identified by residue name, and the solute is
+        everything else. Heavy atoms and backbone are restricted to the solute.
+        Additional selections use the MDAnalysis selection language.
+
+        Parameters
+        ----------
+        universe : Universe
+            system; a topology alone is sufficient
+        selections : Mapping, optional
+            additional selection names and MDAnalysis selection strings
+
+        Returns
+        -------
+        SelectionIndex
+            precomputed selections
+
+        Raises
+        ------
+        ValueError
+            if an additional selection reuses a standard name or is invalid
+        """
+        for name in selections or {}:
+            if name in cls.STANDARD:
+                raise ValueError(f"'{name}' is a standard selection and cannot be redefined.")
+        atoms = universe.atoms
+        resnames = atoms.resnames
+        water = np.isin(resnames, list(WATERS))
+        ions = np.isin(resnames, list(IONS))
+        solute = ~(water | ions)
+
+        heavy = np.zeros(atoms.n_atoms, dtype=bool)
+        heavy[universe.select_atoms("not name H*").indices] = True
+        backbone = np.zeros(atoms.n_atoms, dtype=bool)
+        backbone[universe.select_atoms("backbone").indices] = True
+
+        groups = {
+            "solute": np.flatnonzero(solute),
+            "heavy": np.flatnonzero(solute & heavy),
+            "backbone": np.flatnonzero(solute & backbone),
+            "water": np.flatnonzero(water),
+            "ions": np.flatnonzero(ions),
+        }
+        for name, selection in (selections or {}).items():
+            groups[name] = universe.select_atoms(selection).indices
+
+        residue_starts = np.append(np.flatnonzero(np.diff(atoms.resindices, prepend=-1)), atoms.n_atoms)
+        return cls(groups, residue_starts, atoms.names)
+
+    def save(self, filename: str | Path) -> None:
+        """Save the selections to a compressed NumPy archive.
+
+        Parameters
+        ----------
+        filename : str or Path
+            output file
+        """
+        arrays = {"_residue_starts": self.residue_starts}
+        if self.names is not None:
+            arrays["_names"] = self.names
+        np.savez_compressed(filename, **arrays, **self._groups)
+
+    @classmethod
+    def load(cls, filename: str | Path) -> "SelectionIndex":
+        """Load selections saved by :meth:`save`.
+
+        Parameters
+        ----------
+        filename : str or Path
+            NumPy archive
+
+        Returns
+        -------
+        SelectionIndex
+            precomputed selections
+        """
+        with np.load(filename) as archive:
+            groups = {name: archive[name] for name in archive.files if not name.startswith("_")}
+            names = archive["_names"] if "_names" in archive.files else None
+            return cls(groups, archive["_residue_starts"], names)
+
+    def amber_mask(self, name: str) -> str:
+        """Write a selection as an Amber mask.
+
+        Selections that cover whole residues, or whole residues filtered to
+        heavy atoms or to a few atom names, are written as residue ranges with
+        a filter (e.g., ``:1-133&!@H=`` or ``:1-133@C,CA,N,O``), which keeps
+        them within the 256-character limit of ``restraintmask``. Other
+        selections are written as atom ranges.
+
+        Parameters
+        ----------
+        name : str
+            selection name
+
+        Returns
+        -------
+        str
+            Amber mask
+        """
+        indices = self[name]
+        if indices.size == 0:
+            return "!*"
+        compact = self._compact(indices)
+        if compact is None:
+            return "@" + ",".join(_format_ranges(indices + 1, "-"))
+        residues, kind, names = compact
+        mask = ":" + ",".join(_format_ranges(residues + 1, "-"))
+        if kind == "heavy":
+            return f"{mask}&!@H="
+        if kind == "names":
+            return f"{mask}@{','.join(names)}"
+        return mask
+
+    def charmm_selection(self, name: str) -> str:
+        """Write a selection as a CHARMM ``define`` command.
+
+        Residue ranges use ``ires``, the sequential residue number, combined
+        with ``.not. hydrogen`` or atom ``type`` filters where possible, as in
+        :meth:`amber_mask`. Long commands are continued over several lines.
+
+        Parameters
+        ----------
+        name : str
+            selection name
+
+        Returns
+        -------
+        str
+            CHARMM command defining the selection
+        """
+        indices = self[name]
+        compact = self._compact(indices) if indices.size else None
+        if compact is None:
+            terms = [f"bynum {term}" for term in _format_ranges(indices + 1, ":")] or ["none"]
+            words = [terms[0], *(f".or. {term}" for term in terms[1:])]
+        else:
+            residues, kind, names = compact
+            terms = [f"ires {term}" for term in _format_ranges(residues + 1, ":")]
+            words = [terms[0], *(f".or. {term}" for term in terms[1:])]
+            if kind == "heavy":
+                words = ["(", *words, ")", ".and. .not. hydrogen"]
+            elif kind == "names":
+                types = [f"type {atom}" for atom in names]
+                words = ["(", *words, ")", ".and. (", types[0], *(f".or. {atom}" for atom in types[1:]), ")"]
+        words.append("end")
+
+        lines: list[str] = []
+        line = f"define {name} sele"
+        for word in words:
+            if len(line) + len(word) + 3 > _CHARMM_WIDTH:
+                lines.append(f"{line} -")
+                line = f"    {word}"
+            else:
+                line = f"{line} {word}"
+        lines.append(line)
+        return "\n".join(lines)
+
+    def gromacs_group(self, name: str) -> str:
+        """Write a selection as a Gromacs index group.
+
+        Parameters
+        ----------
+        name : str
+            selection name
+
+        Returns
+        -------
+        str
+            index group
+        """
+        numbers = (self[name] + 1).astype(str)
+        lines = [f"[ {name} ]"]
+        lines.extend(" ".join(numbers[i : i + _GROMACS_WIDTH]) for i in range(0, numbers.size, _GROMACS_WIDTH))
+        return "\n".join(lines)
+
+    def write(self, filename: str | Path, engine: str) -> None:
+        """Write all selections in the native form of a simulation package.
+
+        Parameters
+        ----------
+        filename : str or Path
+            output file
+        engine : str
+            'amber', 'charmm', or 'gromacs'
+
+        Raises
+        ------
+        ValueError
+            if the simulation package is unknown
+        """
+        match engine.lower():
+            case "amber":
+                text = "\n".join(f"{name}={self.amber_mask(name)}" for name in self)
+            case "charmm":
+                text = "\n".join(self.charmm_selection(name) for name in self)
+            case "gromacs":
+                text = "\n\n".join(self.gromacs_group(name) for name in self)
+            case _:
+                raise ValueError(f"{engine} is not a recognized simulation package.")
+        Path(filename).write_text(text + "\n")
+
+    def _compact(self, indices: NDArray[np.uint32]) -> tuple[NDArray[np.intp], str, tuple[str, ...]] | None:
+        """Describe a selection as whole residues with an optional atom filter.
+
+        Parameters
+        ----------
+        indices : NDArray
+            zero-based atom indices
+
+        Returns
+        -------
+        tuple or None
+            zero-based residue indices, the filter ('all', 'heavy', or
+            'names'), and the atom names of a 'names' filter; None if the
+            selection cannot be described this way
+        """
+        sizes = np.diff(self.residue_starts).astype(np.intp)
+        residues = np.unique(np.searchsorted(self.residue_starts, indices, side="right") - 1)
+        within = np.isin(np.repeat(np.arange(sizes.size), sizes), residues)
+        if np.count_nonzero(within) == indices.size:
+            return residues, "all", ()
+        if self.names is None:
+            return None
+
+        heavy = within & ~np.char.startswith(self.names, "H")
+        if np.array_equal(np.flatnonzero(heavy), indices):
+            return residues, "heavy", ()
+        names = np.unique(self.names[indices])
+        if names.size <= _MAX_FILTER_NAMES and np.array_equal(
+            np.flatnonzero(within & np.isin(self.names, names)), indices
+        ):
+            return residues, "names", tuple(str(atom) for atom in names)
+        return None
+
+
+def _format_ranges(numbers: NDArray[np.integer], separator: str) -> list[str]:
+    """Collapse sorted numbers into ranges.
+
+    Parameters
+    ----------
+    numbers : NDArray
+        sorted, unique numbers
+    separator : str
+        text between the first and last number of a range
+
+    Returns
+    -------
+    list of str
+        numbers and ranges, e.g., ``["1-5", "8"]``
+    """
+    if numbers.size == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(numbers) != 1)
+    starts = numbers[np.r_[0, breaks + 1]]
+    stops = numbers[np.r_[breaks, numbers.size - 1]]
+    return [f"{start}" if start == stop else f"{start}{separator}{stop}" for start, stop in zip(starts, stops)]
@@ -0,0 +1,249 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Command server that keeps a warm pool of workers.
+
+Each invocation of ``mdsetup`` otherwise starts a new interpreter and imports
+MDAnalysis, jinja2, and netCDF4 before doing any work. :class:`CommandServer`
+accepts command lines over a local Unix socket and runs them in a pool of
+worker processes that have already imported these modules and every
+subcommand, so the per-command overhead is reduced to a round trip over the
+socket.
+"""
+import asyncio
+import contextlib
+import importlib
+import io
+import os
+import signal
+import socket
+import sys
+import traceback
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import click
+from loguru import logger
+
+from .client import default_socket, receive, send
+
+__all__ = ["CommandServer", "run_command"]
+
+_PRELOAD = ("MDAnalysis", "jinja2", "netCDF4", "numpy")
+# Requests carry the client's environment, which module systems can make large.
+_LINE_LIMIT = 64 * 2**20
+
+
+def _warm_worker() -> None:
+    """Import dependencies and subcommands in a worker process."""
+    from .cli import main
+
+    if not sys.warnoptions:
+        warnings.simplefilter("ignore")
+    for module in _PRELOAD:
+        with contextlib.suppress(ImportError):
+            importlib.import_module(module)
+    for name in main.list_commands(click.Context(main)) or []:
+        main.get_command(click.Context(main), name)
+
+
+def run_command(args: list[str], cwd: str, env: dict[str, str] | None = None) -> dict[str, Any]:
+    """Run a command line within a worker process.
+
+    Parameters
+    ----------
+    args : list of str
+        command-line arguments without the program name
+    cwd : str
+        working directory of the client
+    env : dict, optional
+        environment of the client, which replaces that of the worker for the
+        duration of the command
+
+    Returns
+    -------
+    dict
+        exit code and the captured standard output and error
+    """
+    from .cli import main
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    environ = dict(os.environ)
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    os.chdir(cwd)
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            rv = main.main(args=args, prog_name="mdsetup", standalone_mode=False)
+            exit_code = rv if isinstance(rv, int) else 0
+        except click.ClickException as e:
+            e.show(file=stderr)
+            exit_code = e.exit_code
+        except click.Abort:
+            stderr.write("Aborted!\n")
+            exit_code = 1
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc(file=stderr)
+            exit_code = 1
+        finally:
+            logger.remove()
+            os.environ.clear()
+            os.environ.update(environ)
+    return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+class CommandServer:
+    """Serve mdsetup commands over a Unix socket.
+
+    Parameters
+    ----------
+    socket_path : str or Path, optional
+        socket on which to listen; see :func:`mdsetup.client.default_socket`
+    workers : int, optional
+        number of worker processes; defaults to the number of CPUs
+    """
+
+    def __init__(self, socket_path: str | Path | None = None, workers: int | None = None) -> None:
+        self.socket_path = Path(socket_path) if socket_path is not None else default_socket()
+        self.workers = workers or os.cpu_count() or 1
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def run(self) -> None:
+        """Accept connections until :meth:`shutdown` is called.
+
+        Raises
+        ------
+        RuntimeError
+            if another server is already listening on the socket
+        """
+        self._remove_stale_socket()
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=get_context("spawn"), initializer=_warm_worker
+        ) as self._pool:
+            # Start every worker now so that the first request does not pay for the imports.
+            await asyncio.gather(*(self._loop.run_in_executor(self._pool, _warm_worker) for _ in range(self.workers)))
+
+            # Create the socket without group or other access so that no other user can connect to it.
+            umask = os.umask(0o077)
+            try:
+                server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path), limit=_LINE_LIMIT)
+            finally:
+                os.umask(umask)
+            self.socket_path.chmod(0o600)
+            logger.info(f"Listening on {self.socket_path} with {self.workers} workers")
+            try:
+                async with server:
+                    await self._stop.wait()
+            finally:
+                self.socket_path.unlink(missing_ok=True)
+                logger.info("Server stopped")
+
+    def shutdown(self) -> None:
+        """Stop the server; safe to call from any thread or a signal handler."""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def serve_forever(self) -> None:
+        """Run the server until it receives SIGINT or SIGTERM."""
+
+        async def main() -> None:
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, self.shutdown)
+            await self.run()
+
+        asyncio.run(main())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Run one command line received from a client.
+
+        The client always receives a response; if the request is malformed or
+        the command cannot be run, the response reports the error. A broken
+        worker pool also stops the server, so that later commands run locally.
+
+        Parameters
+        ----------
+        reader : StreamReader
+            stream from the client
+        writer : StreamWriter
+            stream to the client
+        """
+        try:
+            try:
+                request = receive(await reader.readline())
+                args, cwd = [str(arg) for arg in request["args"]], str(request["cwd"])
+                env = {str(key): str(value) for key, value in request.get("env", {}).items()}
+                logger.debug(f"Running mdsetup {' '.join(args)} in {cwd}")
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self._pool, run_command, args, cwd, env)
+            except Exception as e:
+                logger.error(f"Command failed on the server: {e!r}")
+                response = {"exit_code": 1, "stdout": "", "stderr": f"Error: Command failed on the server: {e!r}\n"}
+                if isinstance(e, BrokenProcessPool):
+                    self.shutdown()
+            send(writer, response)
+            await writer.drain()
+        except ConnectionError:
+            logger.debug("Client disconnected before the response was sent")
+        finally:
+            writer.close()
+
+    def _remove_stale_socket(self) -> None:
+        """Remove a socket left behind by a server that is no longer running.
+
+        Raises
+        ------
+        RuntimeError
+            if another server is already listening on the socket
+        """
+        if not self.socket_path.exists():
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(self.socket_path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink(missing_ok=True)
+                return
+        raise RuntimeError(f"A server is already listening on {self.socket_path}")
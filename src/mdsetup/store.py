@@ -0,0 +1,419 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Single-file project storage.
+
+A simulation campaign of many systems, replicas, and equilibration stages
+produces tens of thousands of small files. :class:`ProjectStore` keeps
+topologies, coordinates, rendered input files, and metadata together in one
+indexed SQLite container so that a shared filesystem only sees a single file.
+Individual job directories are materialized on demand with
+:meth:`ProjectStore.export`.
+"""
+import json
+import sqlite3
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from loguru import logger
+
+__all__ = ["ProjectStore", "file_kind"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_kind ON files (kind);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_KINDS = {
+    "topology": {".parm7", ".prmtop", ".psf", ".top", ".itp", ".rtf", ".prm", ".str"},
+    "coordinates": {".pdb", ".rst7", ".inpcrd", ".ncrst", ".crd", ".cor", ".gro", ".xyz"},
+    "input": {".in", ".mdin", ".mdp", ".inp", ".sh", ".slurm", ".pbs"},
+}
+
+
+def file_kind(filename: str | Path) -> str:
+    """Classify a file by its extension.
+
+    Parameters
+    ----------
+    filename : str or Path
+        name of the file
+
+    Returns
+    -------
+    str
+        one of 'topology', 'coordinates', 'input', or 'file'
+    """
+    suffix = Path(filename).suffix.lower()
+    for kind, suffixes in _KINDS.items():
+        if suffix in suffixes:
+            return kind
+    return "file"
+
+
+class ProjectStore:
+    """Project container holding files and metadata in one SQLite database.
+
+    Files are stored zlib-compressed under POSIX-style relative names (e.g.,
+    ``rnase/rep01/equil/equil01.in``), and the primary key on the name allows
+    an entire subdirectory to be retrieved by a prefix range scan.
+
+    Parameters
+    ----------
+    filename : str or Path
+        location of the project container
+    readonly : bool
+        open an existing container without permitting modification
+    """
+
+    def __init__(self, filename: str | Path, readonly: bool = False) -> None:
+        self.filename = Path(filename)
+        self.readonly = readonly
+        if readonly:
+            if not self.filename.exists():
+                raise FileNotFoundError(f"{self.filename} does not exist.")
+            self._conn = sqlite3.connect(f"{self.filename.resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            self._conn = sqlite3.connect(self.filename)
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def __enter__(self) -> "ProjectStore":
+        """Enter the runtime context.
+
+        Returns
+        -------
+        ProjectStore
+            the open store
+        """
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        """Commit pending changes and close the container.
+
+        Parameters
+        ----------
+        exc_type : type, optional
+            exception type
+        exc : BaseException, optional
+            exception raised within the context
+        traceback : TracebackType, optional
+            traceback of the exception
+        """
+        if exc_type is None and not self.readonly:
+            self._conn.commit()
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        """Check whether a file is held in the store.
+
+        Parameters
+        ----------
+        name : str
+            relative name of the file
+
+        Returns
+        -------
+        bool
+            True if the file exists in the store
+        """
+        cursor = self._conn.execute("SELECT 1 FROM files WHERE name = ?", (_normalize(name),))
+        return cursor.fetchone() is not None
+
+    def __len__(self) -> int:
+        """Return the number of files in the store.
+
+        Returns
+        -------
+        int
+            number of files
+        """
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._conn.close()
+
+    def add(self, name: str, data: bytes | str, kind: str | None = None, mode: int = 0o644) -> None:
+        """Add or replace a file in the store.
+
+        Parameters
+        ----------
+        name : str
+            relative name of the file within the project
+        data : bytes or str
+            file contents; strings are UTF-8 encoded
+        kind : str, optional
+            file category; inferred from the extension when not provided
+        mode : int
+            permission bits restored on export
+        """
+        self.add_many([(name, data, kind, mode)])
+
+    def add_many(self, files: Iterable[tuple[str, bytes | str, str | None, int]]) -> int:
+        """Add or replace several files within a single transaction.
+
+        Parameters
+        ----------
+        files : iterable of tuple
+            (name, data, kind, mode) for each file
+
+        Returns
+        -------
+        int
+            number of files written
+        """
+        count = 0
+
+        def rows() -> Iterator[tuple[str, str, int, int, bytes]]:
+            # Files are read and compressed one at a time as SQLite consumes the rows.
+            nonlocal count
+            for name, data, kind, mode in files:
+                raw = data.encode() if isinstance(data, str) else data
+                yield _normalize(name), kind or file_kind(name), mode, len(raw), zlib.compress(raw)
+                count += 1
+
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", rows())
+        return count
+
+    def add_tree(self, directory: str | Path, prefix: str = "", exclude: Iterable[str | Path] = ()) -> int:
+        """Add every file below a directory.
+
+        The store itself and its SQLite journal files are never added, so a
+        store may be kept within the directory it packs.
+
+        Parameters
+        ----------
+        directory : str or Path
+            directory to import
+        prefix : str
+            name prepended to each relative path within the store
+        exclude : iterable of str or Path
+            additional files to skip, such as a log file
+
+        Returns
+        -------
+        int
+            number of files imported
+        """
+        root = Path(directory)
+        store = self.filename.resolve()
+        skipped = {Path(path).resolve() for path in exclude}
+        skipped.update(store.with_name(f"{store.name}{suffix}") for suffix in ("", "-journal", "-wal", "-shm"))
+        files = (
+            (
+                str(Path(prefix, path.relative_to(root)).as_posix()),
+                path.read_bytes(),
+                None,
+                path.stat().st_mode & 0o777,
+            )
+            for path in sorted(root.rglob("*"))
+            if path.is_file() and path.resolve() not in skipped
+        )
+        count = self.add_many(files)
+        logger.info(f"Added {count} files from {root} to {self.filename}")
+        return count
+
+    def read(self, name: str) -> bytes:
+        """Read the contents of a file.
+
+        Parameters
+        ----------
+        name : str
+            relative name of the file
+
+        Returns
+        -------
+        bytes
+            file contents
+
+        Raises
+        ------
+        KeyError
+            if the file is not in the store
+        """
+        row = self._conn.execute("SELECT data FROM files WHERE name = ?", (_normalize(name),)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return zlib.decompress(row[0])
+
+    def names(self, prefix: str = "", kind: str | None = None) -> list[str]:
+        """List files within the store.
+
+        Parameters
+        ----------
+        prefix : str
+            only list files below this directory
+        kind : str, optional
+            only list files of this category
+
+        Returns
+        -------
+        list of str
+            sorted file names
+        """
+        query, params = _prefix_clause(prefix)
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+        cursor = self._conn.execute(f"SELECT name FROM files WHERE {query} ORDER BY name", params)  # noqa: S608
+        return [row[0] for row in cursor]
+
+    def set_metadata(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable metadata value.
+
+        Parameters
+        ----------
+        key : str
+            metadata key
+        value : Any
+            JSON-serializable value
+        """
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """Return all metadata.
+
+        Returns
+        -------
+        dict
+            metadata keys and values
+        """
+        return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM metadata")}
+
+    def export(self, destination: str | Path, prefixes: Iterable[str] = ("",)) -> list[Path]:
+        """Materialize files from the store onto the filesystem.
+
+        Only files below the requested prefixes are written so that a job
+        receives just the directories it needs.
+
+        Parameters
+        ----------
+        destination : str or Path
+            directory in which files are written
+        prefixes : iterable of str
+            directories within the store to export; the default exports all.
+            Files selected by more than one prefix are written once.
+
+        Returns
+        -------
+        list of Path
+            files written
+
+        Raises
+        ------
+        ValueError
+            if a stored name would be written outside of `destination`
+        """
+        root = Path(destination)
+        written: list[Path] = []
+        seen: set[str] = set()
+        for prefix in prefixes:
+            query, params = _prefix_clause(prefix)
+            cursor = self._conn.execute(f"SELECT name, mode, data FROM files WHERE {query}", params)  # noqa: S608
+            for name, mode, data in cursor:
+                # Overlapping prefixes select some files more than once.
+                if name in seen:
+                    continue
+                seen.add(name)
+                # Names from a store created elsewhere may be absolute or contain '..'.
+                path = root.joinpath(_normalize(name))
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # A previous export may have left a read-only file in place.
+                path.unlink(missing_ok=True)
+                path.write_bytes(zlib.decompress(data))
+                path.chmod(mode)
+                written.append(path)
+        logger.info(f"Exported {len(written)} files from {self.filename} to {root}")
+        return written
+
+
+def _normalize(name: str) -> str:
+    """Convert a file name to the POSIX-style relative form used as key.
+
+    Parameters
+    ----------
+    name : str
+        file name
+
+    Returns
+    -------
+    str
+        normalized name
+
+    Raises
+    ------
+    ValueError
+        if the name escapes the project root
+    """
+    parts = [part for part in Path(name).as_posix().split("/") if part not in ("", ".")]
+    if ".." in parts:
+        raise ValueError(f"{name} is outside of the project.")
+    return "/".join(parts)
+
+
+def _prefix_clause(prefix: str) -> tuple[str, tuple[str, ...]]:
+    """Create a WHERE clause selecting a directory by an index range scan.
+
+    Parameters
+    ----------
+    prefix : str
+        directory within the store
+
+    Returns
+    -------
+    tuple
+        SQL clause and its parameters
+    """
+    prefix = _normalize(prefix)
+    if not prefix:
+        return "1", ()
+    # Files within `prefix/` sort between "prefix/" and "prefix0" ('0' follows '/').
+    return "(name = ? OR (name >= ? AND name < ?))", (prefix, f"{prefix}/", f"{prefix}0")
@@ -32,11 +32,12 @@
 # ------------------------------------------------------------------------------
 """Various data files for testing."""
 from importlib import resources
+from pathlib import Path
 
 __all__ = ["PDB", "TOP", "TOPWW"]
 
 _data_ref = resources.files("tests.data")
 
-PDB = resources.as_file(_data_ref / "rnase2_amber.pdb")
-TOP = resources.as_file(_data_ref / "rnase2.parm7")
-TOPWW = resources.as_file(_data_ref / "rnase2_nowat.parm7")
+PDB = Path(_data_ref / "rnase2_amber.pdb")
+TOP = Path(_data_ref / "rnase2.parm7")
+TOPWW = Path(_data_ref / "rnase2_nowat.parm7")
@@ -0,0 +1,226 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for the topology and coordinate consistency check."""
+import os
+from pathlib import Path
+
+import MDAnalysis as mda
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from mdsetup.check import compare, match_atoms
+from mdsetup.cli import main
+
+from .datafile import PDB, TOPWW
+
+
+def _split(atoms: mda.AtomGroup) -> mda.Universe:
+    """Split atoms into two segments that are each numbered from one.
+
+    Parameters
+    ----------
+    atoms : AtomGroup
+        atoms
+
+    Returns
+    -------
+    Universe
+        system with segments A and B
+    """
+    residues = atoms.residues
+    half = residues.n_residues // 2
+    universe = mda.Universe.empty(
+        atoms.n_atoms,
+        n_residues=residues.n_residues,
+        n_segments=2,
+        atom_resindex=atoms.resindices,
+        residue_segindex=(np.arange(residues.n_residues) >= half).astype(int),
+        trajectory=True,
+    )
+    universe.add_TopologyAttr("names", atoms.names)
+    universe.add_TopologyAttr("resnames", residues.resnames)
+    universe.add_TopologyAttr("resids", np.r_[np.arange(half), np.arange(residues.n_residues - half)] + 1)
+    universe.add_TopologyAttr("segids", ["A", "B"])
+    return universe
+
+
+class TestCheck:
+    """Run tests for the consistency check."""
+
+    @pytest.fixture(scope="class")
+    def topology(self) -> mda.AtomGroup:
+        """Load the topology.
+
+        Returns
+        -------
+        AtomGroup
+            atoms of the topology
+        """
+        return mda.Universe(TOPWW).atoms
+
+    @pytest.fixture(scope="class")
+    def coordinates(self) -> mda.AtomGroup:
+        """Load the coordinates.
+
+        Returns
+        -------
+        AtomGroup
+            atoms of the coordinate file
+        """
+        return mda.Universe(PDB).atoms
+
+    def test_consistent(self, coordinates: mda.AtomGroup) -> None:
+        """Test identical atoms.
+
+        GIVEN a coordinate file
+        WHEN it is compared with itself
+        THEN no differences should be reported
+
+        Parameters
+        ----------
+        coordinates : AtomGroup
+            atoms of the coordinate file
+        """
+        report = compare(coordinates, coordinates)
+
+        assert report.consistent
+        assert report.n_missing == report.n_unknown == report.n_reordered == 0
+
+    def test_inconsistent(self, topology: mda.AtomGroup, coordinates: mda.AtomGroup) -> None:
+        """Test mismatched atoms.
+
+        GIVEN a topology with hydrogens and a coordinate file without them
+        WHEN the two are compared
+        THEN the first divergent atom and the missing hydrogens should be reported
+
+        Parameters
+        ----------
+        topology : AtomGroup
+            atoms of the topology
+        coordinates : AtomGroup
+            atoms of the coordinate file
+        """
+        report = compare(topology, coordinates, max_report=3)
+
+        assert not report.consistent
+        assert (report.n_topology, report.n_coordinates) == (2117, 1102)
+        assert len(report.divergences) == 3
+        assert report.divergences[0].index == 1
+        assert report.divergences[0].topology == "MET 1 H1"
+        assert report.divergences[0].coordinates == "MET 1 CA"
+        assert report.missing[0] == "MET 1 H1"
+        assert report.n_missing + (report.n_coordinates - report.n_unknown) == report.n_topology
+
+    def test_reordered(self, coordinates: mda.AtomGroup) -> None:
+        """Test atoms in a different order.
+
+        GIVEN a coordinate file with two atoms swapped
+        WHEN it is compared with the original
+        THEN the swap should be reported as divergent and out of order
+
+        Parameters
+        ----------
+        coordinates : AtomGroup
+            atoms of the coordinate file
+        """
+        swapped = coordinates[[1, 0, *range(2, coordinates.n_atoms)]]
+        report = compare(coordinates, swapped)
+
+        assert not report.consistent
+        assert report.n_divergent == 2
+        assert report.n_reordered == 1
+        assert report.n_missing == report.n_unknown == 0
+
+    def test_strict(self, topology: mda.AtomGroup) -> None:
+        """Test protonation variants of residue names.
+
+        GIVEN a topology with HIE residues and a copy renamed to HIS
+        WHEN the two are compared
+        THEN the names should only differ in strict mode
+
+        Parameters
+        ----------
+        topology : AtomGroup
+            atoms of the topology
+        """
+        universe = mda.Universe(TOPWW)
+        residues = universe.residues
+        residues.resnames = ["HIS" if name == "HIE" else name for name in residues.resnames]
+
+        assert compare(topology, universe.atoms).consistent
+        assert not compare(topology, universe.atoms, strict=True).consistent
+
+    def test_chains(self, coordinates: mda.AtomGroup) -> None:
+        """Test chains that repeat residue numbers.
+
+        GIVEN two chains that are each numbered from one, and a copy with one atom renamed
+        WHEN the two are compared
+        THEN only the renamed atom should be reported, and atoms should be matched within their chain
+
+        Parameters
+        ----------
+        coordinates : AtomGroup
+            atoms of the coordinate file
+        """
+        chains = _split(coordinates)
+        renamed = _split(coordinates)
+        renamed.atoms[-1].name = "XX"
+        report = compare(chains.atoms, renamed.atoms)
+
+        assert report.n_divergent == 1
+        assert report.n_missing == report.n_unknown == 1
+        assert report.n_reordered == 0
+        np.testing.assert_array_equal(
+            match_atoms(chains.atoms, chains.atoms[::-1]), np.arange(chains.atoms.n_atoms)[::-1]
+        )
+
+    def test_cli(self, tmp_path: Path) -> None:
+        """Test the check subcommand.
+
+        GIVEN a mismatched topology and coordinate file
+        WHEN the check subcommand is run
+        THEN the command should fail
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        runner = CliRunner()
+        log = tmp_path / "check.log"
+
+        result = runner.invoke(main, ["check", "-s", str(TOPWW), "-c", str(PDB), "-l", str(log)])
+        assert result.exit_code != os.EX_OK
+
+        result = runner.invoke(main, ["check", "-s", str(PDB), "-c", str(PDB), "-l", str(log)])
+        assert result.exit_code == os.EX_OK
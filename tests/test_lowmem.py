@@ -0,0 +1,167 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for low-memory coordinate handling."""
+import os
+from pathlib import Path
+
+import MDAnalysis as mda
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from mdsetup.cli import main
+from mdsetup.lowmem import CoordinateMap, peak_memory
+
+from .datafile import PDB
+
+
+class TestLowMemory:
+    """Run tests for low-memory coordinate handling."""
+
+    @pytest.fixture(scope="class")
+    def universe(self) -> mda.Universe:
+        """Load the test system.
+
+        Returns
+        -------
+        Universe
+            system with coordinates
+        """
+        return mda.Universe(PDB)
+
+    def test_from_pdb(self, universe: mda.Universe, tmp_path: Path) -> None:
+        """Test streaming a PDB file.
+
+        GIVEN a PDB file
+        WHEN it is streamed in small chunks into a memory-mapped file
+        THEN the coordinates should match those read by MDAnalysis
+
+        Parameters
+        ----------
+        universe : Universe
+            system with coordinates
+        tmp_path : Path
+            temporary directory
+        """
+        coords = CoordinateMap.from_pdb(PDB, tmp_path / "coords.npy", chunk_size=100)
+
+        assert isinstance(coords.positions, np.memmap)
+        assert coords.positions.dtype == np.float32
+        np.testing.assert_array_equal(coords.positions, universe.atoms.positions)
+
+    def test_from_pdb_models(self, universe: mda.Universe, tmp_path: Path) -> None:
+        """Test streaming a PDB file with several models.
+
+        GIVEN a PDB file with two models
+        WHEN it is streamed into a memory-mapped file
+        THEN only the coordinates of the first model should be stored
+
+        Parameters
+        ----------
+        universe : Universe
+            system with coordinates
+        tmp_path : Path
+            temporary directory
+        """
+        records = [line for line in PDB.read_text().splitlines(keepends=True) if line.startswith(("ATOM", "HETATM"))]
+        pdb = tmp_path / "models.pdb"
+        pdb.write_text(
+            "".join(["MODEL        1\n", *records, "ENDMDL\n", "MODEL        2\n", *records, "ENDMDL\nEND\n"])
+        )
+        coords = CoordinateMap.from_pdb(pdb, tmp_path / "coords.npy", chunk_size=100)
+
+        assert coords.n_atoms == universe.atoms.n_atoms
+        np.testing.assert_array_equal(coords.positions, universe.atoms.positions)
+
+    def test_from_universe(self, universe: mda.Universe, tmp_path: Path) -> None:
+        """Test copying an atom group.
+
+        GIVEN an atom group
+        WHEN it is copied in chunks into a memory-mapped file
+        THEN the coordinates should be unchanged
+
+        Parameters
+        ----------
+        universe : Universe
+            system with coordinates
+        tmp_path : Path
+            temporary directory
+        """
+        coords = CoordinateMap.from_universe(universe.atoms, tmp_path / "coords.npy", chunk_size=333)
+
+        assert coords.n_atoms == universe.atoms.n_atoms
+        np.testing.assert_array_equal(coords.positions, universe.atoms.positions)
+
+    def test_invalid_shape(self, tmp_path: Path) -> None:
+        """Test loading an array that is not a coordinate array.
+
+        GIVEN a one-dimensional array
+        WHEN it is loaded as coordinates
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        np.save(tmp_path / "array.npy", np.zeros(6, dtype=np.float32))
+
+        with pytest.raises(ValueError):
+            CoordinateMap(tmp_path / "array.npy")
+
+    def test_peak_memory(self) -> None:
+        """Test the peak memory.
+
+        GIVEN a running process
+        WHEN the peak memory is requested
+        THEN a positive number of bytes should be returned
+        """
+        assert peak_memory() > 0
+
+    def test_cli(self, tmp_path: Path) -> None:
+        """Test the memmap subcommand.
+
+        GIVEN a PDB file
+        WHEN the memmap subcommand is run
+        THEN a float32 array of its coordinates should be written
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        runner = CliRunner()
+        output = tmp_path / "coords.npy"
+        result = runner.invoke(main, ["memmap", "-c", str(PDB), "-o", str(output), "-l", str(tmp_path / "mm.log")])
+
+        assert result.exit_code == os.EX_OK
+        assert CoordinateMap(output).n_atoms == 1102
@@ -0,0 +1,474 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for incremental re-solvation."""
+import os
+from pathlib import Path
+
+import MDAnalysis as mda
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from MDAnalysis.lib.distances import capped_distance
+from mdsetup.cli import main
+from loguru import logger
+from mdsetup.resolvate import FORMAL_CHARGES, PreparedParent, formal_charge, resolvate
+
+from .datafile import PDB
+
+
+def _solvate(protein: mda.Universe, spacing: float = 3.1, margin: float = 8.0, n_chloride: int = 3) -> mda.Universe:
+    """Place the protein within a lattice of three-site waters and chloride ions.
+
+    The solvent forms a segment and chain of its own after those of the protein.
+
+    Parameters
+    ----------
+    protein : Universe
+        solute
+    spacing : float
+        distance between lattice sites
+    margin : float
+        distance between the solute and the edge of the box
+    n_chloride : int
+        number of lattice sites occupied by chloride ions
+
+    Returns
+    -------
+    Universe
+        solvated system
+    """
+    solute = protein.atoms.positions
+    lower = solute.min(axis=0) - margin
+    shape = np.floor((solute.max(axis=0) + margin - lower) / spacing).astype(int)
+    sites = np.indices(shape).reshape(3, -1).T * spacing + lower + spacing / 2
+    box = np.r_[shape * spacing, 90.0, 90.0, 90.0].astype(np.float32)
+    occupied = capped_distance(solute, sites, 3.5, box=box, return_distances=False)[:, 1]
+    sites = np.delete(sites, np.unique(occupied), axis=0).astype(np.float32)
+    ions, oxygens = sites[:n_chloride], sites[n_chloride:]
+    n_waters = len(oxygens)
+    waters = np.stack([oxygens, oxygens + [0.9572, 0.0, 0.0], oxygens + [-0.24, 0.927, 0.0]], axis=1).reshape(-1, 3)
+
+    n_residues = protein.residues.n_residues + n_chloride + n_waters
+    resindex = np.concatenate(
+        [
+            protein.atoms.resindices,
+            protein.residues.n_residues + np.arange(n_chloride),
+            protein.residues.n_residues + n_chloride + np.repeat(np.arange(n_waters), 3),
+        ]
+    )
+    n_segments = protein.segments.n_segments
+    universe = mda.Universe.empty(
+        resindex.size,
+        n_residues=n_residues,
+        n_segments=n_segments + 1,
+        atom_resindex=resindex,
+        residue_segindex=np.r_[protein.residues.segindices, np.full(n_chloride + n_waters, n_segments)],
+        trajectory=True,
+    )
+    universe.add_TopologyAttr("names", [*protein.atoms.names, *["Cl-"] * n_chloride, *["O", "H1", "H2"] * n_waters])
+    universe.add_TopologyAttr("resnames", [*protein.residues.resnames, *["Cl-"] * n_chloride, *["WAT"] * n_waters])
+    universe.add_TopologyAttr(
+        "resids", np.r_[protein.residues.resids, protein.residues.n_residues + np.arange(n_chloride + n_waters) + 1]
+    )
+    universe.add_TopologyAttr("segids", [*protein.segments.segids, "SOLV"])
+    universe.add_TopologyAttr("chainIDs", [*protein.atoms.chainIDs, *["W"] * (n_chloride + 3 * n_waters)])
+    universe.atoms.positions = np.concatenate([solute, ions, waters])
+    universe.dimensions = box
+    return universe
+
+
+def _split(protein: mda.Universe) -> mda.Universe:
+    """Split the protein into two chains that are each numbered from one.
+
+    Parameters
+    ----------
+    protein : Universe
+        solute
+
+    Returns
+    -------
+    Universe
+        solute with chains A and B
+    """
+    residues = protein.residues
+    half = residues.n_residues // 2
+    segindex = (np.arange(residues.n_residues) >= half).astype(int)
+    universe = mda.Universe.empty(
+        protein.atoms.n_atoms,
+        n_residues=residues.n_residues,
+        n_segments=2,
+        atom_resindex=protein.atoms.resindices,
+        residue_segindex=segindex,
+        trajectory=True,
+    )
+    universe.add_TopologyAttr("names", protein.atoms.names)
+    universe.add_TopologyAttr("resnames", residues.resnames)
+    universe.add_TopologyAttr("resids", np.r_[np.arange(half), np.arange(residues.n_residues - half)] + 1)
+    universe.add_TopologyAttr("segids", ["A", "B"])
+    universe.add_TopologyAttr("chainIDs", np.array(["A", "B"])[segindex[protein.atoms.resindices]])
+    universe.atoms.positions = protein.atoms.positions
+    return universe
+
+
+def _truncate(protein: mda.Universe, resname: str, segid: str | None = None) -> mda.Universe:
+    """Mutate the first residue of a type to alanine.
+
+    Parameters
+    ----------
+    protein : Universe
+        solute
+    resname : str
+        residue name to mutate
+    segid : str, optional
+        segment of the residue
+
+    Returns
+    -------
+    Universe
+        mutated solute
+    """
+    selection = f"resname {resname}" if segid is None else f"resname {resname} and segid {segid}"
+    residue = protein.select_atoms(selection).residues[0]
+    mutant = mda.Merge(protein.select_atoms(f"not (resindex {residue.resindex} and not name N CA C O CB)"))
+    mutant.residues[residue.resindex].resname = "ALA"
+    return mutant
+
+
+class TestResolvate:
+    """Run tests for incremental re-solvation."""
+
+    @pytest.fixture(scope="class")
+    def protein(self) -> mda.Universe:
+        """Load the solute.
+
+        Returns
+        -------
+        Universe
+            solute
+        """
+        return mda.Universe(PDB)
+
+    @pytest.fixture(scope="class")
+    def parent(self, protein: mda.Universe) -> mda.Universe:
+        """Solvate the solute.
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+
+        Returns
+        -------
+        Universe
+            solvated parent system
+        """
+        return _solvate(protein)
+
+    @pytest.fixture(scope="class")
+    def prepared(self, parent: mda.Universe) -> PreparedParent:
+        """Index the solvated parent.
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+
+        Returns
+        -------
+        PreparedParent
+            indexed parent system
+        """
+        return PreparedParent(parent)
+
+    def test_unchanged(self, parent: mda.Universe, prepared: PreparedParent, protein: mda.Universe) -> None:
+        """Test an unchanged solute.
+
+        GIVEN a solvated parent and its own solute
+        WHEN the solute is re-solvated
+        THEN the system should be identical to the parent, including its segments and chains
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+        prepared : PreparedParent
+            indexed parent system
+        protein : Universe
+            solute
+        """
+        universe, report = resolvate(prepared, protein)
+
+        assert report.n_changed == report.n_waters_removed == report.n_waters_added == 0
+        np.testing.assert_array_equal(universe.atoms.names, parent.atoms.names)
+        np.testing.assert_array_equal(universe.atoms.positions, parent.atoms.positions)
+        np.testing.assert_array_equal(universe.atoms.segids, parent.atoms.segids)
+        np.testing.assert_array_equal(universe.atoms.chainIDs, parent.atoms.chainIDs)
+
+    def test_remove_counterion(self, parent: mda.Universe, prepared: PreparedParent, protein: mda.Universe) -> None:
+        """Test a mutation that removes a positive charge.
+
+        GIVEN a solvated parent with chloride ions
+        WHEN a lysine is mutated to alanine
+        THEN one chloride should be removed and distant solvent should be unchanged
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+        prepared : PreparedParent
+            indexed parent system
+        protein : Universe
+            solute
+        """
+        radius = 8.0
+        mutant = _truncate(protein, "LYS")
+        universe, report = resolvate(prepared, mutant, radius=radius)
+
+        assert report.n_changed == 9
+        assert report.charge_change == -1
+        assert report.n_ions_removed == 1 and report.n_ions_added == 0
+        assert formal_charge(universe.atoms) == formal_charge(parent.atoms)
+
+        # Waters beyond the region keep their exact coordinates.
+        site = protein.select_atoms("resname LYS").residues[0].atoms.positions
+        oxygens = parent.select_atoms("resname WAT and name O").positions
+        near = capped_distance(site, oxygens, radius, box=parent.dimensions, return_distances=False)[:, 1]
+        output = {tuple(position) for position in universe.select_atoms("resname WAT and name O").positions}
+        assert all(tuple(position) in output for position in np.delete(oxygens, near, axis=0))
+
+    def test_add_counterion(self, parent: mda.Universe, prepared: PreparedParent, protein: mda.Universe) -> None:
+        """Test a mutation that removes a negative charge.
+
+        GIVEN a solvated parent without cations
+        WHEN an aspartate is mutated to alanine
+        THEN a water should be replaced by a chloride away from the solute
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+        prepared : PreparedParent
+            indexed parent system
+        protein : Universe
+            solute
+        """
+        mutant = _truncate(protein, "ASP")
+        universe, report = resolvate(prepared, mutant, ion_distance=5.0)
+        chloride = universe.select_atoms("resname Cl-")
+        solute = universe.select_atoms("not resname WAT Cl-")
+
+        assert report.charge_change == 1
+        assert report.n_ions_added == 1
+        assert chloride.n_atoms == parent.select_atoms("resname Cl-").n_atoms + 1
+        assert formal_charge(universe.atoms) == formal_charge(parent.atoms)
+        assert capped_distance(solute.positions, chloride[-1:].positions, 5.0, box=universe.dimensions)[0].size == 0
+
+    def test_clash(self, parent: mda.Universe, prepared: PreparedParent, protein: mda.Universe) -> None:
+        """Test a solute atom moved into the solvent.
+
+        GIVEN a solute atom moved onto a water
+        WHEN the solute is re-solvated
+        THEN the water should be removed and no water should clash with the solute
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+        prepared : PreparedParent
+            indexed parent system
+        protein : Universe
+            solute
+        """
+        mutant = mda.Merge(protein.atoms)
+        water = parent.select_atoms("resname WAT and name O")[0]
+        mutant.atoms[-1].position = water.position + [0.5, 0.0, 0.0]
+        universe, report = resolvate(prepared, mutant, clash=2.5)
+        waters = universe.select_atoms("resname WAT")
+        solute = universe.select_atoms("not resname WAT Cl-")
+
+        assert report.n_waters_removed >= 1
+        assert capped_distance(solute.positions, waters.positions, 2.5, box=universe.dimensions)[0].size == 0
+
+    def test_no_water(self, protein: mda.Universe) -> None:
+        """Test a parent without water.
+
+        GIVEN a parent system without water
+        WHEN it is used for re-solvation
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+        """
+        with pytest.raises(ValueError):
+            PreparedParent(protein)
+
+    def test_chains(self, protein: mda.Universe) -> None:
+        """Test chains that repeat residue numbers.
+
+        GIVEN a solvated parent with two chains numbered from one
+        WHEN a residue of the second chain is mutated
+        THEN only that residue should change and both chains should be kept
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+        """
+        chains = _split(protein)
+        parent = _solvate(chains)
+        universe, report = resolvate(PreparedParent(parent), _truncate(chains, "ASP", segid="B"))
+        residue = chains.select_atoms("resname ASP and segid B").residues[0]
+
+        # Every atom of the mutated residue changes its residue name, and no atom of chain A changes.
+        assert report.n_changed == residue.atoms.n_atoms
+        assert report.charge_change == 1
+        assert list(universe.segments.segids) == ["A", "B", "SOLV"]
+        assert set(universe.select_atoms("resname WAT").chainIDs) == {"W"}
+
+    def test_ambiguous(self, protein: mda.Universe) -> None:
+        """Test residue numbers repeated within a segment.
+
+        GIVEN a parent in which two residues of one segment share a residue number
+        WHEN its solute is re-solvated
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+        """
+        solute = mda.Merge(protein.atoms)
+        solute.residues[1].resid = solute.residues[0].resid
+        parent = _solvate(solute)
+
+        with pytest.raises(ValueError, match="not uniquely identified"):
+            resolvate(PreparedParent(parent), solute)
+
+    def test_parent_charges(self, protein: mda.Universe) -> None:
+        """Test a parent with partial charges and variants without them.
+
+        GIVEN a parent with partial charges and a ligand of charge -1 that is not in the residue table
+        WHEN its own solute and a mutant, both without charges, are re-solvated
+        THEN the charge should only change for the mutated residue
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+        """
+        solute = mda.Merge(protein.atoms)
+        solute.residues[0].resname = "LIG"
+        parent = _solvate(solute)
+        residue_charges = np.array([FORMAL_CHARGES.get(name, 0) for name in parent.residues.resnames], dtype=float)
+        residue_charges[0] = -1.0
+        sizes = np.bincount(parent.atoms.resindices)
+        parent.add_TopologyAttr("charges", (residue_charges / sizes)[parent.atoms.resindices])
+        prepared = PreparedParent(parent)
+
+        _, report = resolvate(prepared, solute)
+        assert report.n_changed == report.charge_change == report.n_ions_added == report.n_ions_removed == 0
+
+        _, report = resolvate(prepared, _truncate(solute, "LYS"))
+        assert report.charge_change == -1
+        assert report.n_ions_removed == 1
+
+    def test_formal_charge(self, protein: mda.Universe) -> None:
+        """Test the formal charge from partial charges and from residue names.
+
+        GIVEN a solute with and without partial charges, and a ligand of unknown charge
+        WHEN the formal charge is computed
+        THEN partial charges should be preferred and the unknown residue reported
+
+        Parameters
+        ----------
+        protein : Universe
+            solute
+        """
+        universe = mda.Merge(protein.atoms)
+        expected = formal_charge(universe.atoms)
+        universe.residues[0].resname = "LIG"
+        messages: list[str] = []
+        sink = logger.add(messages.append, level="WARNING")
+        try:
+            assert formal_charge(universe.atoms) == expected - FORMAL_CHARGES[protein.residues[0].resname]
+        finally:
+            logger.remove(sink)
+        assert any("LIG" in message for message in messages)
+
+        universe.add_TopologyAttr("charges", np.full(universe.atoms.n_atoms, 0.4 / universe.atoms.n_atoms))
+        universe.atoms[0].charge += 2.0
+        assert formal_charge(universe.atoms) == 2
+
+    def test_cli(self, parent: mda.Universe, protein: mda.Universe, tmp_path: Path) -> None:
+        """Test the resolvate subcommand.
+
+        GIVEN a solvated parent and two mutants
+        WHEN the resolvate subcommand is run
+        THEN a solvated system should be written for each mutant
+
+        Parameters
+        ----------
+        parent : Universe
+            solvated parent system
+        protein : Universe
+            solute
+        tmp_path : Path
+            temporary directory
+        """
+        parent.atoms.write(tmp_path / "parent.pdb")
+        _truncate(protein, "LYS").atoms.write(tmp_path / "K.pdb")
+        _truncate(protein, "ASP").atoms.write(tmp_path / "D.pdb")
+        runner = CliRunner()
+
+        result = runner.invoke(
+            main,
+            [
+                "resolvate",
+                "-c",
+                str(tmp_path / "parent.pdb"),
+                "-m",
+                str(tmp_path / "K.pdb"),
+                "-m",
+                str(tmp_path / "D.pdb"),
+                "-o",
+                str(tmp_path / "out"),
+                "-l",
+                str(tmp_path / "resolvate.log"),
+            ],
+        )
+
+        assert result.exit_code == os.EX_OK
+        assert mda.Universe(tmp_path / "out" / "K_solv.pdb").select_atoms("resname Cl-").n_atoms == 2
+        assert mda.Universe(tmp_path / "out" / "D_solv.pdb").select_atoms("resname Cl-").n_atoms == 4
@@ -0,0 +1,248 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for precomputed atom selections."""
+import os
+from pathlib import Path
+
+import MDAnalysis as mda
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from mdsetup.cli import main
+from mdsetup.selections import SelectionIndex
+
+from .datafile import TOPWW
+
+
+class TestSelectionIndex:
+    """Run tests for precomputed atom selections."""
+
+    @pytest.fixture(scope="class")
+    def index(self) -> SelectionIndex:
+        """Compute the selections of the test system.
+
+        Returns
+        -------
+        SelectionIndex
+            precomputed selections
+        """
+        universe = mda.Universe(TOPWW)
+        return SelectionIndex.from_universe(universe, {"calpha": "name CA"})
+
+    def test_groups(self, index: SelectionIndex) -> None:
+        """Test the standard selections.
+
+        GIVEN a solvent-free topology
+        WHEN the selections are computed
+        THEN the solute should contain every atom and water and ions none
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        """
+        assert list(index) == ["solute", "heavy", "backbone", "water", "ions", "calpha"]
+        assert index["solute"].size == index.n_atoms == 2117
+        assert index["water"].size == index["ions"].size == 0
+        assert index["calpha"].size == 133
+        assert np.isin(index["backbone"], index["heavy"]).all()
+
+    def test_amber_mask(self, index: SelectionIndex) -> None:
+        """Test Amber masks.
+
+        GIVEN precomputed selections
+        WHEN Amber masks are written
+        THEN residue masks with atom name filters should fit within restraintmask
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        """
+        assert index.amber_mask("solute") == ":1-133"
+        assert index.amber_mask("water") == "!*"
+        assert index.amber_mask("heavy") == ":1-133&!@H="
+        assert index.amber_mask("backbone") == ":1-133@C,CA,N,O"
+        assert all(len(index.amber_mask(name)) <= 256 for name in index)
+
+    def test_charmm_selection(self, index: SelectionIndex) -> None:
+        """Test CHARMM selections.
+
+        GIVEN precomputed selections
+        WHEN CHARMM selections are written
+        THEN residue ranges with atom filters should be used
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        """
+        assert index.charmm_selection("solute") == "define solute sele ires 1:133 end"
+        assert index.charmm_selection("ions") == "define ions sele none end"
+        assert index.charmm_selection("heavy") == "define heavy sele ( ires 1:133 ) .and. .not. hydrogen end"
+        backbone = index.charmm_selection("backbone")
+        assert "type CA" in backbone and "bynum" not in backbone
+        assert all(len(line) <= 80 for line in backbone.splitlines())
+
+    def test_atom_mask(self) -> None:
+        """Test a selection of partial residues without a name filter.
+
+        GIVEN a selection of atoms that no residue filter describes
+        WHEN it is written for Amber and CHARMM
+        THEN atom ranges should be used
+        """
+        index = SelectionIndex.from_universe(mda.Universe(TOPWW), {"some": "bynum 1 3:12"})
+
+        assert index.amber_mask("some") == "@1,3-12"
+        assert index.charmm_selection("some") == "define some sele bynum 1 .or. bynum 3:12 end"
+
+    @pytest.mark.parametrize("name", ["_residue_starts", "_names", "file", "allow_pickle", "2nd", "a-b"])
+    def test_invalid_name(self, name: str) -> None:
+        """Test invalid selection names.
+
+        GIVEN a reserved or malformed selection name
+        WHEN the selection index is created
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        name : str
+            selection name
+        """
+        with pytest.raises(ValueError):
+            SelectionIndex({name: np.arange(3)}, np.array([0, 3]))
+
+    @pytest.mark.parametrize("name", ["_residue_starts", "file", "solute"])
+    def test_cli_invalid_name(self, name: str, tmp_path: Path) -> None:
+        """Test reserved names on the command line.
+
+        GIVEN a reserved or standard selection name
+        WHEN the index subcommand is run
+        THEN the command should fail with a usage error
+
+        Parameters
+        ----------
+        name : str
+            selection name
+        tmp_path : Path
+            temporary directory
+        """
+        log = tmp_path / "index.log"
+        result = CliRunner().invoke(
+            main, ["index", "-s", str(TOPWW), "-o", str(tmp_path), "-l", str(log), "--select", f"{name}=name CA"]
+        )
+
+        assert result.exit_code == 2
+        assert "--select" in result.output
+
+    def test_gromacs_group(self, index: SelectionIndex) -> None:
+        """Test Gromacs index groups.
+
+        GIVEN precomputed selections
+        WHEN Gromacs index groups are written
+        THEN the group should contain every one-based atom number
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        """
+        lines = index.gromacs_group("calpha").splitlines()
+        numbers = np.array(" ".join(lines[1:]).split(), dtype=int)
+
+        assert lines[0] == "[ calpha ]"
+        np.testing.assert_array_equal(numbers, index["calpha"] + 1)
+
+    def test_save_load(self, index: SelectionIndex, tmp_path: Path) -> None:
+        """Test round trip through a NumPy archive.
+
+        GIVEN precomputed selections
+        WHEN the selections are saved and loaded
+        THEN the selections should be unchanged
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        tmp_path : Path
+            temporary directory
+        """
+        filename = tmp_path / "index.npz"
+        index.save(filename)
+        loaded = SelectionIndex.load(filename)
+
+        assert list(loaded) == list(index)
+        np.testing.assert_array_equal(loaded.residue_starts, index.residue_starts)
+        for name in index:
+            np.testing.assert_array_equal(loaded[name], index[name])
+
+    def test_write_unknown(self, index: SelectionIndex, tmp_path: Path) -> None:
+        """Test writing for an unknown simulation package.
+
+        GIVEN precomputed selections
+        WHEN an unknown simulation package is requested
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        index : SelectionIndex
+            precomputed selections
+        tmp_path : Path
+            temporary directory
+        """
+        with pytest.raises(ValueError):
+            index.write(tmp_path / "index.txt", "namd")
+
+    def test_cli(self, tmp_path: Path) -> None:
+        """Test the index subcommand.
+
+        GIVEN a topology
+        WHEN the index subcommand is run
+        THEN the selections should be written for each simulation package
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        runner = CliRunner()
+        log = tmp_path / "index.log"
+        result = runner.invoke(
+            main, ["index", "-s", str(TOPWW), "-o", str(tmp_path), "-l", str(log), "--select", "ca=name CA"]
+        )
+
+        assert result.exit_code == os.EX_OK
+        assert "ca=:1-133@CA" in tmp_path.joinpath("index.mask").read_text()
+        assert "[ ca ]" in tmp_path.joinpath("index.ndx").read_text()
+        assert "define ca sele" in tmp_path.joinpath("index.str").read_text()
+        assert "ca" in SelectionIndex.load(tmp_path / "index.npz")
@@ -0,0 +1,211 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for the command server and its client."""
+import asyncio
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from mdsetup.client import NO_SERVER_ENV, forward, forward_command, receive, trusted_socket
+from mdsetup.server import CommandServer, run_command
+
+from .datafile import PDB
+
+
+class TestServer:
+    """Run tests for the command server."""
+
+    def test_forward_without_server(self, tmp_path: Path) -> None:
+        """Test forwarding when no server is running.
+
+        GIVEN a socket location without a server
+        WHEN a command is forwarded
+        THEN the command should be left to run locally
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        assert forward(["check", "--help"], tmp_path / "mdsetup.sock") is None
+
+    def test_untrusted_socket(self, tmp_path: Path) -> None:
+        """Test a socket in a directory that other users can write to.
+
+        GIVEN a socket in a world-writable directory without the sticky bit
+        WHEN the socket is checked before connecting
+        THEN it should only be trusted once the directory is private
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        socket_path = tmp_path / "mdsetup.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(socket_path))
+            tmp_path.chmod(0o777)
+            assert not trusted_socket(socket_path)
+            assert forward(["check", "--help"], socket_path) is None
+
+            tmp_path.chmod(0o700)
+            assert trusted_socket(socket_path)
+
+    def test_forward_without_reply(self, tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+        """Test a server that closes the connection without a response.
+
+        GIVEN a socket whose server closes every connection
+        WHEN a command is forwarded
+        THEN the client should fail with an error naming the way to run locally
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        capsys : CaptureFixture
+            captured output
+        """
+        socket_path = tmp_path / "mdsetup.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(socket_path))
+            sock.listen()
+
+            def close() -> None:
+                connection, _ = sock.accept()
+                with connection, connection.makefile("rb") as stream:
+                    stream.readline()
+
+            thread = threading.Thread(target=close)
+            thread.start()
+            exit_code = forward(["check", "--help"], socket_path)
+            thread.join()
+
+        assert exit_code == 1
+        assert NO_SERVER_ENV in capsys.readouterr().err
+
+    @pytest.mark.parametrize("args", [[], ["--version"], ["serve"], ["bad_subcommand"]])
+    def test_forward_command_local(self, args: list[str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test command lines that are never forwarded.
+
+        GIVEN a main command option, the serve subcommand, or an unknown subcommand
+        WHEN the command line is checked for forwarding
+        THEN it should run locally
+
+        Parameters
+        ----------
+        args : list of str
+            command-line arguments
+        tmp_path : Path
+            temporary directory
+        monkeypatch : MonkeyPatch
+            patch for the environment
+        """
+        monkeypatch.setenv("MDSETUP_SOCKET", str(tmp_path / "mdsetup.sock"))
+        tmp_path.joinpath("mdsetup.sock").touch()
+
+        assert forward_command(args) is None
+
+    def test_run_command(self) -> None:
+        """Test running a command within a worker.
+
+        GIVEN a command line
+        WHEN it is run as a worker would
+        THEN the output and exit code should be captured
+        """
+        response = run_command(["check", "--help"], str(Path.cwd()))
+        assert response["exit_code"] == os.EX_OK
+        assert "Usage:" in response["stdout"]
+
+        response = run_command(["check", "-s", "missing.parm7"], str(Path.cwd()))
+        assert response["exit_code"] != os.EX_OK
+        assert "Error:" in response["stderr"]
+
+        environ = dict(os.environ)
+        response = run_command(["check", "--help"], str(Path.cwd()), env={"MDSETUP_TEST": "1"})
+        assert response["exit_code"] == os.EX_OK
+        assert dict(os.environ) == environ
+
+    @pytest.mark.integration
+    def test_serve(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture) -> None:
+        """Test forwarding a command to a running server.
+
+        GIVEN a running server
+        WHEN a subcommand is forwarded
+        THEN it should run in the client's directory with a large environment and return its exit code,
+        and a malformed request should receive an error response
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        monkeypatch : MonkeyPatch
+            patch for the environment
+        capsys : CaptureFixture
+            captured output
+        """
+        socket_path = tmp_path / "mdsetup.sock"
+        monkeypatch.setenv("MDSETUP_SOCKET", str(socket_path))
+        monkeypatch.delenv(NO_SERVER_ENV, raising=False)
+        monkeypatch.chdir(tmp_path)
+
+        server = CommandServer(socket_path, workers=1)
+        thread = threading.Thread(target=asyncio.run, args=(server.run(),))
+        thread.start()
+        try:
+            for _ in range(600):
+                if socket_path.is_socket():
+                    break
+                time.sleep(0.1)
+
+            # Module systems on clusters can make the forwarded environment larger than 64 KiB.
+            monkeypatch.setenv("MDSETUP_TEST_LARGE", "x" * 100_000)
+            exit_code = forward_command(["check", "-s", str(PDB), "-c", str(PDB), "-l", "check.log"])
+            mode = socket_path.stat().st_mode & 0o777
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(str(socket_path))
+                sock.sendall(b"not a request\n")
+                error = receive(sock.makefile("rb").readline())
+        finally:
+            server.shutdown()
+            thread.join()
+
+        assert exit_code == os.EX_OK
+        assert mode == 0o600
+        assert "is consistent" in capsys.readouterr().out
+        assert tmp_path.joinpath("check.log").exists()
+        assert error["exit_code"] == 1
+        assert "Error:" in error["stderr"]
+        assert not socket_path.exists()
@@ -0,0 +1,280 @@
+# ------------------------------------------------------------------------------
+# mdsetup
+#  Copyright (c) 2023 Timothy H. Click
+#
+#  All rights reserved.
+#
+#  Redistribution and use in source and binary forms, with or without
+#  modification, are permitted provided that the following conditions are met:
+#
+#  Redistributions of source code must retain the above copyright notice, this
+#  list of conditions and the following disclaimer.
+#
+#  Redistributions in binary form must reproduce the above copyright notice,
+#  this list of conditions and the following disclaimer in the documentation
+#  and/or other materials provided with the distribution.
+#
+#  Neither the name of the author nor the names of its contributors may be used
+#  to endorse or promote products derived from this software without specific
+#  prior written permission.
+#
+#  THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS “AS IS”
+#  AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+#  IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+#  ARE DISCLAIMED. IN NO EVENT SHALL THE REGENTS OR CONTRIBUTORS BE LIABLE FOR
+#  ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+#  DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+#  SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+#  CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+#  LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+#  OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH
+#  DAMAGE.
+# ------------------------------------------------------------------------------
+"""Test cases for the project store."""
+import os
+import sqlite3
+import zlib
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+from mdsetup.cli import main
+from mdsetup.store import ProjectStore, file_kind
+
+
+class TestProjectStore:
+    """Run tests for the project store."""
+
+    @pytest.fixture()
+    def project(self, tmp_path: Path) -> Path:
+        """Create a small project directory.
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+
+        Returns
+        -------
+        Path
+            project directory
+        """
+        root = tmp_path / "project"
+        for replica in ("rep01", "rep02"):
+            equil = root / "rnase" / replica / "equil"
+            equil.mkdir(parents=True)
+            equil.joinpath("equil01.in").write_text(f"{replica} equilibration\n")
+        root.joinpath("rnase", "rnase.parm7").write_text("%VERSION\n")
+        return root
+
+    def test_file_kind(self) -> None:
+        """Test classification of files.
+
+        GIVEN several file names
+        WHEN the files are classified
+        THEN the category should match the extension
+        """
+        assert file_kind("rnase.parm7") == "topology"
+        assert file_kind("rnase.PDB") == "coordinates"
+        assert file_kind("equil01.in") == "input"
+        assert file_kind("README") == "file"
+
+    def test_add_tree(self, project: Path, tmp_path: Path) -> None:
+        """Test importing a directory.
+
+        GIVEN a project directory
+        WHEN the directory is added to the store
+        THEN every file should be retrievable by name and category
+
+        Parameters
+        ----------
+        project : Path
+            project directory
+        tmp_path : Path
+            temporary directory
+        """
+        with ProjectStore(tmp_path / "project.db") as store:
+            count = store.add_tree(project)
+
+            assert count == len(store) == 3
+            assert "rnase/rep01/equil/equil01.in" in store
+            assert store.read("rnase/rep02/equil/equil01.in") == b"rep02 equilibration\n"
+            assert store.names(kind="topology") == ["rnase/rnase.parm7"]
+
+    def test_names_prefix(self, project: Path, tmp_path: Path) -> None:
+        """Test listing by directory.
+
+        GIVEN a store with several replicas
+        WHEN files are listed below a directory
+        THEN only files within that directory should be returned
+
+        Parameters
+        ----------
+        project : Path
+            project directory
+        tmp_path : Path
+            temporary directory
+        """
+        with ProjectStore(tmp_path / "project.db") as store:
+            store.add_tree(project)
+            store.add("rnase/rep01.log", "not in rep01")
+
+            assert store.names("rnase/rep01") == ["rnase/rep01/equil/equil01.in"]
+
+    def test_read_missing(self, tmp_path: Path) -> None:
+        """Test reading a missing file.
+
+        GIVEN an empty store
+        WHEN a file is read
+        THEN a KeyError should be raised
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        with ProjectStore(tmp_path / "project.db") as store, pytest.raises(KeyError):
+            store.read("missing.pdb")
+
+    def test_outside_project(self, tmp_path: Path) -> None:
+        """Test adding a file outside of the project.
+
+        GIVEN a store
+        WHEN a file name refers to a parent directory
+        THEN a ValueError should be raised
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        with ProjectStore(tmp_path / "project.db") as store, pytest.raises(ValueError):
+            store.add("../escape.in", "")
+
+    def test_export_outside(self, tmp_path: Path) -> None:
+        """Test exporting names that point outside of the destination.
+
+        GIVEN a store created elsewhere with an absolute name and a name containing '..'
+        WHEN it is exported
+        THEN the absolute name should be written below the destination and the other rejected
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        filename = tmp_path / "project.db"
+        ProjectStore(filename).close()
+        with sqlite3.connect(filename) as conn:
+            conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?)", ("/abs/job.in", "input", 0o644, 0, zlib.compress(b""))
+            )
+        conn.close()
+
+        with ProjectStore(filename, readonly=True) as store:
+            assert store.export(tmp_path / "job") == [tmp_path / "job" / "abs" / "job.in"]
+
+        with sqlite3.connect(filename) as conn:
+            conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?)", ("../escape.in", "input", 0o644, 0, zlib.compress(b""))
+            )
+        conn.close()
+
+        with ProjectStore(filename, readonly=True) as store, pytest.raises(ValueError):
+            store.export(tmp_path / "job")
+        assert not tmp_path.joinpath("escape.in").exists()
+
+    def test_metadata(self, tmp_path: Path) -> None:
+        """Test metadata persistence.
+
+        GIVEN a store with metadata
+        WHEN the store is reopened
+        THEN the metadata should be preserved
+
+        Parameters
+        ----------
+        tmp_path : Path
+            temporary directory
+        """
+        with ProjectStore(tmp_path / "project.db") as store:
+            store.set_metadata("replicas", ["rep01", "rep02"])
+        with ProjectStore(tmp_path / "project.db", readonly=True) as store:
+            assert store.metadata == {"replicas": ["rep01", "rep02"]}
+
+    def test_pack_export(self, project: Path, tmp_path: Path) -> None:
+        """Test packing and exporting from the command line.
+
+        GIVEN a project directory
+        WHEN the directory is packed and one replica is exported
+        THEN only the files of that replica should be written
+
+        Parameters
+        ----------
+        project : Path
+            project directory
+        tmp_path : Path
+            temporary directory
+        """
+        runner = CliRunner()
+        db = tmp_path / "project.db"
+        outdir = tmp_path / "job"
+        log = tmp_path / "mdsetup.log"
+
+        result = runner.invoke(main, ["pack", "-d", str(project), "-o", str(db), "-l", str(log)])
+        assert result.exit_code == os.EX_OK
+
+        result = runner.invoke(main, ["export", "-i", str(db), "-o", str(outdir), "-l", str(log), "rnase/rep02"])
+        assert result.exit_code == os.EX_OK
+        assert outdir.joinpath("rnase", "rep02", "equil", "equil01.in").read_text() == "rep02 equilibration\n"
+        assert not outdir.joinpath("rnase", "rep01").exists()
+
+    def test_pack_defaults(self, project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test packing with the default paths.
+
+        GIVEN a project directory as the working directory
+        WHEN the directory is packed twice with the default paths
+        THEN neither the store nor the log file should be packed
+
+        Parameters
+        ----------
+        project : Path
+            project directory
+        monkeypatch : MonkeyPatch
+            patch for the working directory
+        """
+        monkeypatch.chdir(project)
+        runner = CliRunner()
+
+        for _ in range(2):
+            result = runner.invoke(main, ["pack"])
+            assert result.exit_code == os.EX_OK
+
+        with ProjectStore(project / "project.db", readonly=True) as store:
+            assert "project.db" not in store
+            assert "pack.log" not in store
+            assert len(store) == 3
+
+    def test_export_twice(self, project: Path, tmp_path: Path) -> None:
+        """Test exporting read-only files with overlapping prefixes.
+
+        GIVEN a store with a read-only file
+        WHEN it is exported twice to the same directory with overlapping prefixes
+        THEN each file should be written once per export without error
+
+        Parameters
+        ----------
+        project : Path
+            project directory
+        tmp_path : Path
+            temporary directory
+        """
+        outdir = tmp_path / "job"
+        with ProjectStore(tmp_path / "project.db") as store:
+            store.add_tree(project)
+            store.add("rnase/rep01/equil/readonly.in", "frozen\n", mode=0o444)
+
+            for _ in range(2):
+                written = store.export(outdir, prefixes=("rnase", "rnase/rep01"))
+                assert len(written) == len(set(written)) == 4
+
+        assert outdir.joinpath("rnase", "rep01", "equil", "readonly.in").read_text() == "frozen\n"